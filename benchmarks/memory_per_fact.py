@@ -0,0 +1,53 @@
+"""
+Memory benchmark: bytes allocated per fact (Relation) of a problem.
+
+Builds a synthetic problem on the Camelot domain and measures, with tracemalloc, the memory used by the
+objects of the problem and by its facts.
+
+Usage: python benchmarks/memory_per_fact.py [number of facts]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ev_pddl.PDDL import PDDL_Parser
+from ev_pddl.entity import Entity
+from ev_pddl.problem import Problem
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import RelationValue
+
+DOMAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ev_pddl', 'data', 'camelot_domain.pddl')
+
+
+def build_facts(domain, problem, n_facts):
+    at = domain.find_predicate('at')
+    characters = problem.find_objects_with_type('character')
+    positions = problem.find_objects_with_type('position')
+    facts = []
+    for i in range(n_facts):
+        entities = [characters[i % len(characters)], positions[i // len(characters)]]
+        facts.append(Relation(at, entities, RelationValue.TRUE, domain, problem))
+    return facts
+
+
+def main(n_facts):
+    domain = PDDL_Parser().parse_domain(DOMAIN)
+    problem = Problem('memory', domain)
+    n_objects = int(n_facts ** 0.5) + 1
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for i in range(n_objects):
+        problem.add_object(Entity('character%d' % i, domain.find_type('character')))
+        problem.add_object(Entity('position%d' % i, domain.find_type('location')))
+    objects = tracemalloc.get_traced_memory()[0]
+    facts = build_facts(domain, problem, n_facts)
+    end = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('objects: %d, bytes per object: %.1f' % (2 * n_objects, (objects - start) / (2 * n_objects)))
+    print('facts: %d, bytes per fact: %.1f' % (len(facts), (end - objects) / len(facts)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
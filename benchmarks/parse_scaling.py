@@ -0,0 +1,51 @@
+"""
+Scaling benchmark: time taken by PDDL_Parser.parse_problem as the number of :init facts grows.
+
+Generates problems on the Camelot domain with 1k to 1M facts and prints the parse time and the time per fact,
+which stays roughly constant when parsing is linear.
+
+Usage: python benchmarks/parse_scaling.py [largest number of facts]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ev_pddl.PDDL import PDDL_Parser
+
+DOMAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ev_pddl', 'data', 'camelot_domain.pddl')
+
+
+def write_problem(filename, n_facts):
+    n_objects = int(n_facts ** 0.5) + 1
+    with open(filename, 'w') as f:
+        f.write('(define (problem scaling)\n    (:domain CamelotDomain)\n    (:objects\n')
+        for i in range(n_objects):
+            f.write('        character%d - character\n' % i)
+            f.write('        position%d - location\n' % i)
+        f.write('    )\n    (:init\n')
+        for i in range(n_facts):
+            f.write('        (at character%d position%d)\n' % (i % n_objects, i // n_objects))
+        f.write('    )\n)\n')
+
+
+def main(max_facts):
+    parser = PDDL_Parser()
+    parser.parse_domain(DOMAIN)
+    n_facts = 1000
+    with tempfile.TemporaryDirectory() as directory:
+        while n_facts <= max_facts:
+            filename = os.path.join(directory, 'problem_%d.pddl' % n_facts)
+            write_problem(filename, n_facts)
+            start = time.perf_counter()
+            problem = parser.parse_problem(filename)
+            elapsed = time.perf_counter() - start
+            print('facts: %8d  parse time: %8.3f s  per fact: %6.2f us' %
+                  (len(problem.initial_state), elapsed, elapsed / n_facts * 1e6))
+            n_facts *= 10
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
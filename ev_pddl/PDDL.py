@@ -3,57 +3,130 @@ from ev_pddl.relation import Relation
 from ev_pddl.entity import Entity
 from ev_pddl.predicate import Predicate
 import re
+import io
+import itertools
 from ev_pddl.action_definition import ActionDefinition
 from ev_pddl.action_parameter import ActionParameter
 from ev_pddl.action_proposition import ActionProposition
 from ev_pddl.types import Type
 from ev_pddl.domain import Domain
 from ev_pddl.problem import Problem
+from ev_pddl.pddl_cache import PDDLCache, dumps_problem, loads_problem
+import concurrent.futures
+import pickle
+
+_TOKEN_RE = re.compile(r';[^\n]*|\n|[()]|[^\s();]+')
 
 class PDDL_Parser:
 
-    def __init__(self, nodomain = False):
-        if not nodomain:
-            self.domain = Domain()
+    def __init__(self, nodomain = False, cache_dir = None):
+        self.domain = Domain() if not nodomain else None
         self.supported_keywords = ['and', 'or', 'not', 'forall']
+        # When a cache directory is given, parsed domains and problems are kept on disk and reused
+        self.cache = PDDLCache(cache_dir) if cache_dir is not None else None
+        self._domain_key = None
     # ------------------------------------------
     # Tokens
     # ------------------------------------------
 
     def scan_tokens(self, filename):
         with open(filename,'r') as f:
-            # Remove single line comments
-            str = re.sub(r';.*$', '', f.read(), flags=re.MULTILINE).lower()
-        # Tokenize
-        return self._tokenize(str)
+            return self._build_tree(self._iter_tokens(f))
+
+    def _tokenize_string(self, string):
+        return self._build_tree(self._iter_tokens(io.StringIO(string)))
+
+    def _read_content(self, filename):
+        with open(filename, 'rb') as f:
+            return f.read()
+
+    def _scan_content(self, content):
+        return self._build_tree(self._iter_tokens(io.StringIO(content.decode(), newline=None)))
     
     def _tokenize(self, str, skip_malformed_expression = False):
+        return self._build_tree(self._iter_tokens(io.StringIO(str), lower = False), skip_malformed_expression)
+
+    def _iter_tokens(self, stream, lower = True, chunk_size = 65536):
+        """
+        Generator that reads a stream in chunks and yields its tokens in a single pass.
+
+        Comments are dropped, line breaks are yielded as '\n' tokens. Only the last, possibly incomplete, token of a
+        chunk is carried over to the next one, so the memory used does not depend on the size of the stream.
+
+        Parameters
+        ----------
+        stream : file object
+            text stream to tokenize
+        lower : bool, optional, default True
+            if True, tokens are lower-cased
+        chunk_size : int, optional
+            number of characters read from the stream at a time
+
+        Yields
+        ------
+        tuple
+            (token, line, column) with 1-based line and column of the token
+        """
+        line = 1
+        line_start = 0
+        offset = 0
+        buffer = ''
+        eof = False
+        while not eof:
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            if lower:
+                chunk = chunk.lower()
+            buffer += chunk
+            consumed = 0
+            for match in _TOKEN_RE.finditer(buffer):
+                token = match.group()
+                if not eof and match.end() == len(buffer) and token not in '()\n':
+                    # the token or the comment can continue in the next chunk
+                    break
+                consumed = match.end()
+                if token == '\n':
+                    yield token, line, offset + match.start() - line_start + 1
+                    line += 1
+                    line_start = offset + consumed
+                elif token[0] != ';':
+                    yield token, line, offset + match.start() - line_start + 1
+            else:
+                consumed = len(buffer)
+            offset += consumed
+            buffer = buffer[consumed:]
+
+    def _build_tree(self, tokens, skip_malformed_expression = False):
+        """
+        Builds the nested lists of an expression from the tokens yielded by _iter_tokens.
+
+        Inside :types and :objects the line breaks are kept as '\n' items, because they separate the groups of names
+        that share a type.
+        """
         stack = []
         list = []
         current = ''
-        for t in re.findall(r'[()]|[^ \t()]+', str):
+        for t, line, column in tokens:
             if t == '(':
-                stack.append(list)
+                stack.append((list, line, column))
                 list = []
             elif t == ')':
                 if stack:
                     l = list
-                    list = stack.pop()
+                    list = stack.pop()[0]
                     list.append(l)
                     current = ''
                 else:
-                    raise Exception('Missing open parentheses')
-            elif t != '\n':
+                    raise Exception('Missing open parentheses for ) at line %d, column %d' % (line, column))
+            elif t == '\n':
+                if (current == ':types' or current == ':objects') and list and list[-1] != '\n' and list[-1] != current:
+                    list.append(t)
+            else:
                 if ':' in t:
-                    current = t.replace('\n', '')
-                words = t.split('\n')
-                if not all(p == '' for p in words):
-                    tmod = t.replace('\n', '')
-                    list.append(tmod)
-                    if ((current == ':types' and tmod != ":types") or (current == ':objects' and tmod != ":objects")) and '\n' in t:
-                        list.append('\n')
+                    current = t
+                list.append(t)
         if stack:
-            raise Exception('Missing close parentheses')
+            raise Exception('Missing close parentheses for ( at line %d, column %d' % stack[-1][1:])
         if not skip_malformed_expression:
             if len(list) != 1:
                 raise Exception('Malformed expression')
@@ -66,89 +139,139 @@ class PDDL_Parser:
     #-----------------------------------------------
 
     def parse_domain(self, domain_filename):
-        tokens = self.scan_tokens(domain_filename)
-        if type(tokens) is list and tokens.pop(0) == 'define':
-            self.actions = []
-            self.types = []
-            self.predicates = []
-            while tokens:
-                group = tokens.pop(0)
-                t = group.pop(0)
+        """
+        Parse a domain file. The parsed domain becomes the domain of the parser, used by default to parse problems.
+        """
+        if self.cache is None:
+            return self._set_domain(self._parse_domain_tokens(self.scan_tokens(domain_filename), domain_filename), None)
+        return self._parse_domain_content(self._read_content(domain_filename), domain_filename)
+
+    def parse_domain_string(self, domain_string):
+        """
+        Parse a domain from a string. The parsed domain becomes the domain of the parser, used by default to parse problems.
+        """
+        if self.cache is None:
+            return self._set_domain(self._parse_domain_tokens(self._tokenize_string(domain_string), '<string>'), None)
+        return self._parse_domain_content(domain_string.encode(), '<string>')
+
+    def parse_domain_stream(self, stream):
+        """
+        Parse a domain from a text or binary file object. The parsed domain becomes the domain of the parser, used by
+        default to parse problems.
+        """
+        name = getattr(stream, 'name', '<stream>')
+        if self.cache is None and isinstance(stream, io.TextIOBase):
+            return self._set_domain(self._parse_domain_tokens(self._build_tree(self._iter_tokens(stream)), name), None)
+        content = stream.read()
+        if type(content) is str:
+            content = content.encode()
+        if self.cache is None:
+            return self._set_domain(self._parse_domain_tokens(self._scan_content(content), name), None)
+        return self._parse_domain_content(content, name)
+
+    def _parse_domain_content(self, content, domain_filename):
+        key = self.cache.key(content)
+        domain = self.cache.load_domain(key)
+        if domain is None:
+            domain = self._parse_domain_tokens(self._scan_content(content), domain_filename)
+            self.cache.store_domain(key, domain)
+        return self._set_domain(domain, key)
+
+    def _set_domain(self, domain, key):
+        self.domain = domain
+        self._domain_key = key
+        return domain
+
+    def _parse_domain_tokens(self, tokens, domain_filename):
+        domain = Domain()
+        if type(tokens) is list and tokens and tokens[0] == 'define':
+            for group in itertools.islice(tokens, 1, None):
+                t = group[0]
                 if   t == 'domain':
-                    self.domain.domain_name = group[0]
+                    domain.domain_name = group[1]
                 elif t == ':requirements':
-                    self.domain.requirements = group[0]
+                    domain.requirements = group[1]
                     # TODO raise exception for unknown requirements
                 elif t == ':predicates':
-                    self.parse_predicates(group)
+                    self.parse_predicates(group[1:], domain)
                 elif t == ':types':
-                    self.parse_types_and_objects(group, 'types')
+                    self.parse_types_and_objects(group[1:], 'types', domain)
+                    domain.freeze_types()
                 elif t == ':action':
-                    self.parse_action(group)
-                    self.domain.actions = self.actions
+                    self.parse_action(group[1:], domain)
                 else: print(str(t) + ' is not recognized in domain')
+            domain.freeze_types()
         else:
-            raise 'File ' + domain_filename + ' does not match domain pattern'
-        return self.domain
+            raise Exception('File ' + domain_filename + ' does not match domain pattern')
+        return domain
     #-----------------------------------------------
     # Parse types
     #-----------------------------------------------
-    def parse_types_and_objects(self, group, target):
+    def parse_types_and_objects(self, group, target, domain = None):
         """
-        Method to parse the Types and objects and adding them to the domain/problem. 
+        Method to parse the Types and objects. Types are added to the domain, objects are returned in a list. 
         """
+        if domain is None:
+            domain = self.domain
+        objects = []
         if not type(group) is list:
             raise Exception('No types defined')
 
         extend = Type("object", None)
         list_extend = []
+        seen = set()
 
-        while(group):
-            item = group.pop(0)
+        items = iter(group)
+        for item in items:
             if item != '\n':
                 if item == '-':
-                    name = group.pop(0)
+                    name = next(items, None)
+                    if name is None:
+                        raise Exception('Type missing after "-" in %s'%(target))
                     if name != 'object':
-                        extend = self.domain.find_type(name)
+                        extend = domain.find_type(name)
                         if extend is None:
                             raise Exception('Type %s not found in %s'%(name, target))
                 elif '-' in item:
                     raise Exception ('Found "-" attached to a name of a type, please put spaces between types. Error: %s'%(str(item)))
                 else:
-                    if item in list_extend:
+                    if item in seen:
                         raise Exception ('Cannot create %s twice'%(target))
+                    seen.add(item)
                     list_extend.append(item)
             else:
                 for i in list_extend:
                     if target == 'types':
-                        self.domain.add_type(Type(i, extend))
+                        domain.add_type(Type(i, extend))
                     else:
-                        self.objects.append(Entity(i, extend, self.problem))
+                        objects.append(Entity(i, extend))
                 list_extend = []
+                seen = set()
+        return objects
 
     #-----------------------------------------------
     # Parse predicates
     #-----------------------------------------------
-    def parse_predicates(self, group):
+    def parse_predicates(self, group, domain = None):
+        if domain is None:
+            domain = self.domain
         if not type(group) is list:
             raise Exception('No predicates defined')
 
         for predicate in group:
             if type(predicate) is not list:
                 raise Exception ('Invalid predicate parsing. Expecting list got %s' % str(type(predicate)))
-            predicate1 = self._parse_predicate(predicate)
-            if self.domain.find_predicate(predicate1.name) is not None:
+            predicate1 = self._parse_predicate(predicate, domain)
+            if domain.find_predicate(predicate1.name) is not None:
                 raise Exception('Two predicates with the same name (%s) are declared'%(predicate1.name))
-            self.domain.add_predicate(predicate1)
+            domain.add_predicate(predicate1)
 
-    def _parse_predicate(self, predicate):
-        work_list = predicate.copy()
+    def _parse_predicate(self, predicate, domain):
         first = True
         n_arg = 0
         args = []
         predicate_obj = Predicate('', [])
-        while work_list:
-            item = work_list.pop(0)
+        for item in predicate:
             if first:
                 if '?' in item:
                     raise Exception('? cannot be in the name of the predicate')
@@ -162,7 +285,7 @@ class PDDL_Parser:
                     if possible_type != '':
                         item = possible_type
             if '?' not in item and item != '-':
-                t = self.domain.find_type(item)
+                t = domain.find_type(item)
                 if t is None:
                     raise Exception('Type "%s" used in predicate %s not found' % (item,predicate_obj.name))
                 for a in args:
@@ -180,121 +303,204 @@ class PDDL_Parser:
     # Parse action
     #-----------------------------------------------
 
-    def parse_action(self, group): #TODO: check predicates
-        name = group.pop(0)
+    def parse_action(self, group, domain = None): #TODO: check predicates
+        if domain is None:
+            domain = self.domain
+        items = iter(group)
+        name = next(items, None)
         if not type(name) is str:
             raise Exception('Action without name definition')
-        for act in self.actions:
-            if act.name == name:
-                raise Exception('Action ' + name + ' redefined')
+        if domain.find_action_with_name(name) is not None:
+            raise Exception('Action ' + name + ' redefined')
         action_parameters = []
         preconditions = []
         effects = []
-        while group:
-            t = group.pop(0)
+        for t in items:
             if t == ':parameters':
-                if not type(group) is list:
+                parameters = next(items, None)
+                if not type(parameters) is list:
                     raise Exception('Error with ' + name + ' parameters')
-                action_parameters = self.parse_variable(group.pop(0))
+                action_parameters = self.parse_variable(parameters, domain)
             elif t == ':precondition':
-                preconditions = self.split_propositions(group.pop(0), name, ':preconditions', action_parameters)
+                preconditions = self.split_propositions(next(items, None), name, ':preconditions', action_parameters, domain)
             elif t == ':effect':
-                effects = self.split_propositions(group.pop(0),  name, ':effects', action_parameters)
+                effects = self.split_propositions(next(items, None),  name, ':effects', action_parameters, domain)
             else: print(str(t) + ' is not recognized in action')
-        self.actions.append(ActionDefinition(name, action_parameters, preconditions, effects))
+        domain.add_action(ActionDefinition(name, action_parameters, preconditions, effects))
 
     #-----------------------------------------------
     # Parse problem
     #-----------------------------------------------
 
-    def parse_problem(self, problem_filename):
-        tokens = self.scan_tokens(problem_filename)
-        if type(tokens) is list and tokens.pop(0) == 'define':
-            self.problem_name = 'unknown'
-            self.objects = []
-            self.starting_state = []
-            while tokens:
-                group = tokens.pop(0)
+    def parse_problem(self, problem_filename, domain = None):
+        """
+        Parse a problem file against domain, by default the domain of the parser.
+        """
+        if domain is None:
+            domain = self.domain
+        if self._get_domain_key(domain) is None:
+            return self._parse_problem_tokens(self.scan_tokens(problem_filename), domain)
+        return self._parse_problem_content(self._read_content(problem_filename), domain)
+
+    def parse_problem_string(self, problem_string, domain = None):
+        """
+        Parse a problem from a string against domain, by default the domain of the parser.
+        """
+        if domain is None:
+            domain = self.domain
+        if self._get_domain_key(domain) is None:
+            return self._parse_problem_tokens(self._tokenize_string(problem_string), domain)
+        return self._parse_problem_content(problem_string.encode(), domain)
+
+    def parse_problem_stream(self, stream, domain = None):
+        """
+        Parse a problem from a text or binary file object against domain, by default the domain of the parser.
+        """
+        if domain is None:
+            domain = self.domain
+        if self._get_domain_key(domain) is None and isinstance(stream, io.TextIOBase):
+            return self._parse_problem_tokens(self._build_tree(self._iter_tokens(stream)), domain)
+        content = stream.read()
+        if type(content) is str:
+            content = content.encode()
+        if self._get_domain_key(domain) is None:
+            return self._parse_problem_tokens(self._scan_content(content), domain)
+        return self._parse_problem_content(content, domain)
+
+    def parse_problems(self, problem_filenames, domain = None, max_workers = None, serialized = False):
+        """
+        Parse many problem files against the same domain with a pool of processes.
+
+        Parameters
+        ----------
+        problem_filenames : list of str
+            problem files to parse
+        domain : Domain, optional
+            domain of the problems, by default the domain of the parser
+        max_workers : int, optional
+            number of processes, by default the number of processors
+        serialized : bool, optional, default False
+            if True, the problems are returned serialized with pddl_cache.dumps_problem instead of as Problem
+
+        Returns
+        -------
+        list
+            problems (or serialized problems) in the same order as problem_filenames
+        """
+        if domain is None:
+            domain = self.domain
+        cache_dir = self.cache.cache_dir if self.cache is not None else None
+        with concurrent.futures.ProcessPoolExecutor(max_workers, initializer = _init_batch_worker,
+                                                    initargs = (pickle.dumps(domain), self._get_domain_key(domain), cache_dir)) as executor:
+            results = list(executor.map(_parse_problem_in_worker, problem_filenames))
+        if serialized:
+            return results
+        return [loads_problem(item, domain) for item in results]
+
+    def _get_domain_key(self, domain):
+        # Problems are cached only when parsed against the domain the parser loaded through the cache
+        if self.cache is None or domain is not self.domain:
+            return None
+        return self._domain_key
+
+    def _parse_problem_content(self, content, domain):
+        key = self.cache.key(content, self._get_domain_key(domain))
+        problem = self.cache.load_problem(key, domain)
+        if problem is None:
+            problem = self._parse_problem_tokens(self._scan_content(content), domain)
+            if problem is not None:
+                self.cache.store_problem(key, problem)
+        return problem
+
+    def _parse_problem_tokens(self, tokens, domain):
+        if type(tokens) is list and tokens and tokens[0] == 'define':
+            problem_name = 'unknown'
+            problem = None
+            for group in itertools.islice(tokens, 1, None):
                 t = group[0]
                 if   t == 'problem':
-                    self.problem_name = group[-1]
+                    problem_name = group[-1]
                 elif t == ':domain':
-                    if self.domain.domain_name != group[-1]:
+                    if domain.domain_name != group[-1]:
                         raise Exception('Different domain specified in problem file')
-                    self.problem = Problem(self.problem_name, self.domain)
+                    problem = Problem(problem_name, domain)
                 elif t == ':requirements':
                     pass # Ignore requirements in problem, parse them in the domain
                 elif t == ':objects':
-                    group.pop(0)
-                    self.parse_types_and_objects(group, 'objects')
-                    self.problem.objects = self.objects
+                    problem.objects = self.parse_types_and_objects(group[1:], 'objects', domain)
                 elif t == ':init':
-                    group.pop(0)
-                    self.parse_relations(group)
-                    self.problem.initial_state = self.starting_state
+                    problem.initial_state = self.parse_relations(group[1:], problem)
                 elif t == ':goal':
                     #We don't need the goal yet
                     pass
                 else: print(str(t) + ' is not recognized in problem')
-            return self.problem
+            return problem
 
-    def parse_relations(self, group):
-        while group:
-            item = group.pop(0)
-            pred = self.domain.find_predicate(item.pop(0))
+    def parse_relations(self, group, problem):
+        """
+        Parse the relations of the :init block of a problem and return them in a list.
+        """
+        domain = problem.domain
+        relations = []
+        for item in group:
+            pred = domain.find_predicate(item[0])
             entities = []
-            while item:
-                i = item.pop(0)
-                ent = self.problem.find_objects(i)
+            for i in itertools.islice(item, 1, None):
+                ent = problem.find_objects(i)
                 if ent is None:
                     raise Exception('Couldn\'t find object %s'%(i))
                 entities.append(ent)
-            self.starting_state.append(Relation(pred, entities, RelationValue.TRUE, self.domain, self.problem))
+            relations.append(Relation(pred, entities, RelationValue.TRUE, domain, problem))
+        return relations
     #-----------------------------------------------
     # Split propositions
     #-----------------------------------------------
-    def split_propositions(self, group, name, part, action_parameters):
+    def split_propositions(self, group, name, part, action_parameters, domain = None):
+        if domain is None:
+            domain = self.domain
         if not type(group) is list:
             raise Exception('Error with ' + name + part)
-        return self._split_proposition(group, action_parameters)
+        return self._split_proposition(group, action_parameters, domain)
 
     
-    def _split_proposition(self, group, action_parameters):      
-        prop = group.pop(0)
+    def _split_proposition(self, group, action_parameters, domain):      
+        prop = group[0]
         if prop == 'and':
             action_prop = ActionProposition('and', [])
-            for item in group:
-                self._evaluate_proposition(item, action_parameters, action_prop)
+            for item in itertools.islice(group, 1, None):
+                self._evaluate_proposition(item, action_parameters, action_prop, domain)
             return action_prop
         elif prop == 'not':
             action_prop = ActionProposition('not', [])
-            if len(group) > 1:
+            if len(group) > 2:
                 raise Exception("Proposition not can have only one predicate")
-            self._evaluate_proposition(group[0], action_parameters, action_prop)
+            self._evaluate_proposition(group[1], action_parameters, action_prop, domain)
             return action_prop
         elif prop == 'or':
             action_prop = ActionProposition('or', [])
-            for item in group:
-                self._evaluate_proposition(item, action_parameters, action_prop)
+            for item in itertools.islice(group, 1, None):
+                self._evaluate_proposition(item, action_parameters, action_prop, domain)
             return action_prop
         elif prop == 'forall': 
-            param = self.parse_variable(group[0])[0]
+            param = self.parse_variable(group[1], domain)[0]
             # adding parameter to list of action-paramenters that the evaluate proposition is checking 
             # because we need to have the parameter used in the forall to be checked. 
             # TODO(priority low): be sure that the parameter is used
             forall_action_paramenters = action_parameters.copy()
             forall_action_paramenters.append(param)
             action_prop = ActionProposition('forall', [], argument=param)
-            self._evaluate_proposition(group[1], forall_action_paramenters, action_prop)
+            self._evaluate_proposition(group[2], forall_action_paramenters, action_prop, domain)
             return action_prop
         else:
             raise Exception('Proposition not supported.')
 
-    def parse_variable(self, parameters):
+    def parse_variable(self, parameters, domain = None):
+        if domain is None:
+            domain = self.domain
         name_p = []
         action_parameters = []
-        while parameters:
-            item = parameters.pop(0)
+        items = iter(parameters)
+        for item in items:
             if '?' in item:
                 if '-' in item:
                     raise Exception('Character "-" attached to the name of the variable')
@@ -302,13 +508,15 @@ class PDDL_Parser:
             elif '-' in item:    
                 type_p = ''
                 if item == '-':
-                    type_p = parameters.pop(0)
+                    type_p = next(items, None)
+                    if type_p is None:
+                        raise Exception('Error while parsing action parameters')
                 else:
                     type_p = item.replace('-', '')
                 if len(name_p) == 0:
                     raise Exception('Error while parsing action parameters')
 
-                type_obj = self.domain.find_type(type_p)
+                type_obj = domain.find_type(type_p)
                 if type_obj is None:
                     raise Exception ('Name of type "%s" in action parameter does not exist'%(type_p))
                 for i in name_p:
@@ -322,11 +530,11 @@ class PDDL_Parser:
                 return item
         return None
     
-    def _evaluate_proposition(self, item, action_parameters, action_prop):
+    def _evaluate_proposition(self, item, action_parameters, action_prop, domain):
         if item[0] in self.supported_keywords:
-            action_prop.add_parameter(self._split_proposition(item, action_parameters))
+            action_prop.add_parameter(self._split_proposition(item, action_parameters, domain))
         else:
-            pred = self.domain.find_predicate(item[0])
+            pred = domain.find_predicate(item[0])
             if pred is None:
                 raise Exception('Predicate is not recognized')
             if len(item)-1 != len(pred.arguments):
@@ -339,7 +547,7 @@ class PDDL_Parser:
                     raise Exception('Action Parameter is not recognized')
                 i += 1
                 #check if predicates arguments are fulfilled
-                if arg in found_action_parameter.type.get_list_extensions():
+                if found_action_parameter.type.is_subtype(arg):
                     list_action_paramenter.append(found_action_parameter)
                 else:
                     raise ValueError("Action predicate don't correspond")
@@ -394,4 +602,15 @@ class PDDL_Parser:
     #     if token[0] != 'effect':
     #         raise Exception('Action string is not valid: :effect not found')
     #     return_dict['action_effect'] = token[1]
-    #     return return_dict
\ No newline at end of file
+    #     return return_dict
+
+# Per-process parser used by PDDL_Parser.parse_problems
+_batch_parser = None
+
+def _init_batch_worker(domain_data, domain_key, cache_dir):
+    global _batch_parser
+    _batch_parser = PDDL_Parser(nodomain = True, cache_dir = cache_dir)
+    _batch_parser._set_domain(pickle.loads(domain_data), domain_key)
+
+def _parse_problem_in_worker(problem_filename):
+    return dumps_problem(_batch_parser.parse_problem(problem_filename))
@@ -1,7 +1,6 @@
 from ev_pddl.action_definition import ActionDefinition
 from ev_pddl.action_proposition import ActionProposition
-from ev_pddl.predicate import Predicate
-from ev_pddl.relation import Relation, RelationValue
+from types import MappingProxyType
 
 class Action:
     """
@@ -26,6 +25,7 @@ class Action:
         self.__parameters = {}
         self.__preconditions = None
         self.__effects = None
+        self.__frozen = False
         self.create_action(self._action_definition, parameters)
     
     #-----------------------------------
@@ -43,6 +43,8 @@ class Action:
         """
         Setter for the parameters of the action. If you change the parameters the action will be rebuilt
         """
+        if self.__frozen:
+            raise AttributeError("Action %s is frozen, its parameters cannot be changed" % (self.name))
         self.create_action(self._action_definition, parameters)
     
     #-----------------------------------
@@ -79,63 +81,34 @@ class Action:
         parameters : dict
             the parameters that need to be sobstituted from the action_definition
         """
-        #Cheking action_definition parameters with dict of parameters passed in the method to be sobstitute in the action
-        for param in action_definition.parameters:
-            if param.name in parameters.keys():
-                self.__parameters[param.name] = parameters[param.name]
-            else:
-                raise KeyError("Parameter %s in action %s not found"%(param.name, action_definition.name))
-        #Transforming preconditions from predicate to relations
-        self.__preconditions = self._transform_action_proposition_recursive(action_definition.preconditions)
-        #Transforming effects from predicate to relations
-        self.__effects = self._transform_action_proposition_recursive(action_definition.effects)
-        
-    def _transform_action_proposition_recursive(self, action_prop: ActionProposition):
-        """A method that is used to recursively navigate an actionProposition and transform the predicates to relations
-        
-        Parameters
-        ----------
-        action_prop : ActionProposition
-            actionProposition to navigate and transform to relations
+        if self.__frozen:
+            raise AttributeError("Action %s is frozen, it cannot be created again" % (self.name))
+        template = action_definition.get_template()
+        entities = template.bind(parameters)
+        self.__parameters = dict(zip(template.parameters, entities))
+        #Substituting the entities in the compiled preconditions and effects
+        self.__preconditions = template.ground(template.preconditions, entities)
+        self.__effects = template.ground(template.effects, entities)
+
+    def freeze(self):
+        """A method that is used to make the action immutable, so that it can be shared.
+
+        The parameters become a read-only mapping, the preconditions and effects cannot be extended and the parameters
+        setter and create_action raise AttributeError.
         """
-        if action_prop.name in ['and', "or", "not"]:
-            if action_prop.name == 'not' and len(action_prop.parameters) == 1:
-                relation = self._from_predicate_to_relation(action_prop.parameters[0], True)
-                return relation
-            return_action_prop = ActionProposition(action_prop.name, [])
-            for item in action_prop.parameters:
-                if type(item) == Predicate:
-                    relation = self._from_predicate_to_relation(item)
-                    return_action_prop.add_parameter(relation)
-                elif type(item) == ActionProposition:
-                    return_action_prop.add_parameter(self._transform_action_proposition_recursive(item))
-            return return_action_prop
-        elif action_prop.name == 'forall':
-            #TODO: transformation for forall
-            pass   
+        if self.__frozen:
+            return
+        self.__frozen = True
+        self.__parameters = MappingProxyType(self.__parameters)
+        for item in (self.__preconditions, self.__effects):
+            if isinstance(item, ActionProposition):
+                item.freeze()
 
-    def _from_predicate_to_relation(self, predicate, not_value = False) -> Relation:
-        """A method that is used to transform a predicate to a relation
-        
-        Parameters
-        ----------
-        predicate : Predicate
-            predicate that needs to be transformed
-        not_value : bool, optional
-            needs to be True only in case we want a False relation
+    def is_frozen(self):
+        """A method that returns True if the action is frozen
         """
-        list_entity = []
-        list_type = []
-        for arg in predicate.arguments:
-            if arg.name not in self.__parameters.keys():
-                raise ValueError("%s not found in list of parameters"%(arg.name))
-            list_entity.append(self.__parameters[arg.name])
-            list_type.append(arg.type)
-        if not_value:
-            return Relation(predicate, list_entity, RelationValue.FALSE)
-        else:
-            return Relation(predicate, list_entity, RelationValue.TRUE)
-    
+        return self.__frozen
+
     def to_PDDL(self):
         """A method that is used to transform the action to a PDDL action
 
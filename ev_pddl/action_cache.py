@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+from ev_pddl.action import Action
+
+
+class ActionCache:
+    """
+    A class used to keep a bounded number of grounded actions, so that the same action is not rebuilt every time.
+
+    Actions are indexed by the name of their definition and the tuple of entities bound to its parameters. The least
+    recently used action is dropped when the cache is full. The cache is emptied when the domain changes.
+    The actions returned are frozen, because the same instance is given to every caller.
+
+    Attributes
+    ----------
+    domain : Domain
+        domain of the actions
+    maxsize : int
+        maximum number of actions kept
+    hits : int
+        number of actions found in the cache
+    misses : int
+        number of actions that had to be built
+    """
+
+    def __init__(self, domain, maxsize = 1024):
+        if maxsize <= 0:
+            raise ValueError("ActionCache maxsize must be greater than 0")
+        self.domain = domain
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__actions = OrderedDict()
+        self.__domain_version = domain.version
+
+    def get_action(self, action_definition, parameters) -> Action:
+        """A method that is used to get the grounded action of a definition
+
+        Parameters
+        ----------
+        action_definition : ActionDefinition
+            definition of the action
+        parameters : dict
+            entities of the action indexed by parameter name
+
+        Returns
+        -------
+        Action
+            frozen action
+        """
+        entities = action_definition.get_template().bind(parameters)
+        return self.get_action_with_entities(action_definition, entities)
+
+    def get_action_with_entities(self, action_definition, entities) -> Action:
+        """A method that is used to get the grounded action of a definition from the entities in parameter order
+
+        Parameters
+        ----------
+        action_definition : ActionDefinition
+            definition of the action
+        entities : tuple
+            entities bound to the parameters of the definition, in the order they are defined
+
+        Returns
+        -------
+        Action
+            frozen action
+        """
+        if self.__domain_version != self.domain.version:
+            self.clear()
+            self.__domain_version = self.domain.version
+        key = (action_definition.name, entities)
+        item = self.__actions.get(key)
+        if item is not None and item[0] is action_definition:
+            self.hits += 1
+            self.__actions.move_to_end(key)
+            return item[1]
+        self.misses += 1
+        template = action_definition.get_template()
+        action = Action(action_definition, dict(zip(template.parameters, entities)))
+        action.freeze()
+        self.__actions[key] = (action_definition, action)
+        self.__actions.move_to_end(key)
+        if len(self.__actions) > self.maxsize:
+            self.__actions.popitem(last=False)
+        return action
+
+    def clear(self):
+        """A method that is used to empty the cache. The counters are not reset.
+        """
+        self.__actions.clear()
+
+    def __len__(self):
+        return len(self.__actions)
+
+    def __str__(self) -> str:
+        return "ActionCache: %d/%d actions, %d hits, %d misses" % (len(self.__actions), self.maxsize, self.hits, self.misses)
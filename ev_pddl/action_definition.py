@@ -1,10 +1,13 @@
 class ActionDefinition:
 
+    __slots__ = ('name', 'parameters', 'preconditions', 'effects', '_template')
+
     def __init__(self, name, parameters, preconditions, effects):
         self.name = name
         self.parameters = parameters
         self.preconditions = preconditions
         self.effects = effects
+        self._template = None
 
     def __str__(self):
         string = 'action: ' + self.name 
@@ -24,6 +27,17 @@ class ActionDefinition:
             self.effects == other.effects
         )
     
+    def get_template(self):
+        """
+        Returns the ActionTemplate of this definition, compiled on the first call. The template is not rebuilt if the
+        definition is changed afterwards.
+        """
+        if self._template is None:
+            # Imported here because action_template depends on relation, which depends on the domain
+            from ev_pddl.action_template import ActionTemplate
+            self._template = ActionTemplate(self)
+        return self._template
+
     def get_dict_parameters(self):
         return_dict = {}
         for item in self.parameters:
@@ -0,0 +1,242 @@
+import itertools
+
+from ev_pddl.action import Action
+from ev_pddl.action_template import ActionTemplate
+
+
+class ActionEnumerator:
+    """
+    A class used to enumerate the groundings of the actions of a domain that can be applied to a WorldState.
+
+    The literals of the top-level conjunction of the preconditions are joined against the relation indexes of the
+    world state: each literal is matched with the relations of its predicate and value, going through the entity index
+    when one of its parameters is already bound, and the entities it binds are filtered by the type of the parameter.
+    Literals on static predicates, which no action changes, are joined first and an action whose static literals have no
+    match is skipped. Parameters that no literal binds are enumerated over the entities of their type. Preconditions
+    that are not part of the conjunction (or, nested propositions) are checked on the grounded action.
+
+    Attributes
+    ----------
+    domain : Domain
+        domain of the actions
+    action_cache : ActionCache or None
+        cache used to build the actions, if None a new Action is built for every grounding
+    """
+
+    def __init__(self, domain, action_cache = None):
+        self.domain = domain
+        self.action_cache = action_cache
+        self.__domain_version = None
+        self.__static_predicates = set()
+
+    def get_static_predicates(self) -> set:
+        """A method that returns the names of the predicates that don't appear in the effects of any action
+        """
+        if self.__domain_version != self.domain.version:
+            dynamic = set()
+            for action_definition in self.domain.actions:
+                template = action_definition.get_template()
+                for literal in self.iter_literals(template.effects):
+                    dynamic.add(literal[1].name)
+            self.__static_predicates = set(item.name for item in self.domain.predicates) - dynamic
+            self.__domain_version = self.domain.version
+        return self.__static_predicates
+
+    def applicable_actions(self, world_state, action_definitions = None):
+        """A generator that yields the actions that can be applied to the world state
+
+        Parameters
+        ----------
+        world_state : WorldState
+            world state the actions are checked against
+        action_definitions : list, optional
+            definitions of the actions to enumerate, by default all the actions of the domain
+
+        Yields
+        ------
+        Action
+            applicable grounded action
+        """
+        if action_definitions is None:
+            action_definitions = self.domain.actions
+        static_predicates = self.get_static_predicates()
+        for action_definition in action_definitions:
+            yield from self._applicable_groundings(world_state, action_definition, static_predicates)
+
+    def applicable_actions_with_relation(self, world_state, action_definition, literal_index, relation):
+        """A generator that yields the applicable actions of a definition in which one literal of the top-level
+        conjunction of the preconditions is matched by a given relation
+
+        Parameters
+        ----------
+        world_state : WorldState
+            world state the actions are checked against
+        action_definition : ActionDefinition
+            definition of the actions
+        literal_index : int
+            position of the literal in the list returned by get_literals
+        relation : Relation
+            relation of the world state that matches the literal
+        """
+        literals, _ = self.get_literals(action_definition)
+        _, predicate, slots, value = literals[literal_index]
+        if relation.predicate.name != predicate.name or relation.value != value or len(relation.entities) != len(slots):
+            return
+        parameter_types = [item.type for item in action_definition.parameters]
+        binding = [None] * len(parameter_types)
+        for slot, entity in zip(slots, relation.entities):
+            if binding[slot] is None:
+                if not entity.type.is_subtype(parameter_types[slot]):
+                    return
+                binding[slot] = entity
+            elif binding[slot] != entity:
+                return
+        others = literals[:literal_index] + literals[literal_index + 1:]
+        yield from self._applicable_groundings(world_state, action_definition, self.get_static_predicates(), others, binding)
+
+    def get_literals(self, action_definition):
+        """A method that returns the literals of the top-level conjunction of the preconditions of a definition
+
+        Returns
+        -------
+        tuple
+            (list of compiled literals, True if some preconditions are not literals of the conjunction)
+        """
+        return self._split_conjunction(action_definition.get_template().preconditions)
+
+    def _applicable_groundings(self, world_state, action_definition, static_predicates, literals = None, binding = None):
+        template = action_definition.get_template()
+        residual = self.get_literals(action_definition)[1]
+        if literals is None:
+            literals = self.get_literals(action_definition)[0]
+        if binding is None:
+            binding = [None] * len(template.parameters)
+        parameter_types = [item.type for item in action_definition.parameters]
+        bound = set(i for i, item in enumerate(binding) if item is not None)
+        literals = self._order_literals(world_state, literals, static_predicates, bound)
+        if literals is None:
+            return
+        for binding in self._join(world_state, literals, 0, binding, parameter_types):
+            unbound = [i for i, item in enumerate(binding) if item is None]
+            if unbound:
+                candidates = [world_state.find_entities_with_type(parameter_types[i]) for i in unbound]
+                # The product is walked lazily, so that the caller can stop at the first applicable action
+                groundings = self._complete_bindings(tuple(binding), unbound, candidates)
+            else:
+                groundings = [tuple(binding)]
+            for entities in groundings:
+                action = self._build_action(action_definition, template, entities)
+                if residual and not world_state.can_action_be_applied(action):
+                    continue
+                yield action
+
+    def _complete_bindings(self, binding, unbound, candidates):
+        """A generator that yields the binding completed with each combination of candidates for the unbound slots
+        """
+        for entities in itertools.product(*candidates):
+            full = list(binding)
+            for i, entity in zip(unbound, entities):
+                full[i] = entity
+            yield tuple(full)
+
+    def _build_action(self, action_definition, template, entities):
+        if self.action_cache is not None:
+            return self.action_cache.get_action_with_entities(action_definition, entities)
+        return Action(action_definition, dict(zip(template.parameters, entities)))
+
+    def _split_conjunction(self, compiled):
+        """A method that splits compiled preconditions in the literals that can be joined and the rest
+
+        Returns
+        -------
+        tuple
+            (list of literals, True if some preconditions are not literals of the conjunction)
+        """
+        if compiled is None:
+            return [], False
+        if compiled[0] == ActionTemplate.LITERAL:
+            return [compiled], False
+        if compiled[1] != 'and':
+            return [], True
+        literals = []
+        residual = False
+        for item in compiled[2]:
+            if item[0] == ActionTemplate.LITERAL:
+                literals.append(item)
+            else:
+                residual = True
+        return literals, residual
+
+    def _order_literals(self, world_state, literals, static_predicates, bound):
+        """A method that orders the literals for the join. Returns None if a literal cannot be matched.
+
+        The next literal is the one with the most parameters already bound, static literals first and then the one
+        with fewer matching relations. When the join starts from a bound relation, see applicable_actions_with_relation,
+        the relations are not counted and the literals are only ordered by bound parameters.
+        """
+        sizes = [0] * len(literals)
+        if not bound:
+            for i, literal in enumerate(literals):
+                sizes[i] = world_state.count_relations(literal[1], literal[3])
+                if sizes[i] == 0:
+                    return None
+        ordered = []
+        bound = set(bound)
+        remaining = list(range(len(literals)))
+        while remaining:
+            def rank(i):
+                literal = literals[i]
+                n_bound = sum(1 for slot in literal[2] if slot in bound)
+                return (-n_bound, literal[1].name not in static_predicates, sizes[i])
+            best = min(remaining, key=rank)
+            remaining.remove(best)
+            ordered.append(literals[best])
+            bound.update(literals[best][2])
+        return ordered
+
+    def _join(self, world_state, literals, i, binding, parameter_types):
+        if i == len(literals):
+            yield binding
+            return
+        _, predicate, slots, value = literals[i]
+        bound_entity = None
+        for slot in slots:
+            if binding[slot] is not None:
+                bound_entity = binding[slot]
+                break
+        if bound_entity is not None:
+            candidates = world_state.get_entity_relations(bound_entity, predicates=[predicate], value_list=[value])
+        else:
+            candidates = world_state.get_relations(predicates=[predicate], value_list=[value])
+        for relation in candidates:
+            entities = relation.entities
+            if len(entities) != len(slots):
+                continue
+            new_slots = []
+            match = True
+            for slot, entity in zip(slots, entities):
+                current = binding[slot]
+                if current is None:
+                    if not entity.type.is_subtype(parameter_types[slot]):
+                        match = False
+                        break
+                    binding[slot] = entity
+                    new_slots.append(slot)
+                elif current != entity:
+                    match = False
+                    break
+            if match:
+                yield from self._join(world_state, literals, i + 1, binding, parameter_types)
+            for slot in new_slots:
+                binding[slot] = None
+
+    def iter_literals(self, compiled):
+        """A generator that yields all the literals of compiled preconditions or effects
+        """
+        if compiled is None:
+            return
+        if compiled[0] == ActionTemplate.LITERAL:
+            yield compiled
+        else:
+            for item in compiled[2]:
+                yield from self.iter_literals(item)
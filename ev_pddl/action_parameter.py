@@ -2,6 +2,8 @@ from ev_pddl.types import Type
 
 class ActionParameter:
 
+    __slots__ = ('name', 'type')
+
     def __init__(self, name, type_p):
         self.name = name
         if type(type_p) is not Type:
@@ -1,5 +1,7 @@
 class ActionProposition:
 
+    __slots__ = ('name', 'parameters', 'argument')
+
     def __init__(self, name, parameters, argument = None):
         self.name = name
         if type(parameters) is not list:
@@ -7,13 +9,21 @@ class ActionProposition:
         self.parameters = parameters
         if argument is None and name == 'forall':
             raise Exception('Forall needs an argument to check')
-        if argument is not None:
-            self.argument = argument
+        self.argument = argument
 
     
     def add_parameter(self, item):
         self.parameters.append(item)
 
+    def freeze(self):
+        """
+        Turn the parameters of this proposition, and of the nested ones, into tuples so that they cannot be changed
+        """
+        for item in self.parameters:
+            if isinstance(item, ActionProposition):
+                item.freeze()
+        self.parameters = tuple(self.parameters)
+
     def __str__(self):
         string = ""
         if self.name == 'forall':
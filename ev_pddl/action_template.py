@@ -0,0 +1,133 @@
+from ev_pddl.action_proposition import ActionProposition
+from ev_pddl.forall_proposition import ForallProposition
+from ev_pddl.predicate import Predicate
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import RelationValue
+
+
+class ActionTemplate:
+    """
+    A class used to represent an ActionDefinition compiled for grounding.
+
+    The precondition and effect trees of the definition are walked once. Every predicate becomes a literal
+    (predicate, slot indices, value) where the slot indices point into the tuple of parameters, so grounding an action
+    is a substitution of the slots without type checks or lookups by name. The variable of a forall precondition gets
+    the slot after the ones in scope; it is grounded later, see ForallProposition.
+
+    Attributes
+    ----------
+    name : str
+        name of the action
+    parameters : tuple of str
+        names of the parameters of the action, in slot order
+    preconditions : tuple or None
+        compiled preconditions
+    effects : tuple or None
+        compiled effects
+    """
+
+    __slots__ = ('name', 'parameters', 'preconditions', 'effects')
+
+    # Kinds of compiled items
+    LITERAL = 0
+    PROPOSITION = 1
+    FORALL = 2
+
+    def __init__(self, action_definition):
+        self.name = action_definition.name
+        self.parameters = tuple(item.name for item in action_definition.parameters)
+        slots = {name: i for i, name in enumerate(self.parameters)}
+        self.preconditions = self._compile(action_definition.preconditions, slots, True)
+        self.effects = self._compile(action_definition.effects, slots, False)
+
+    def _compile(self, action_prop, slots, allow_forall):
+        """A method that is used to compile an ActionProposition of the definition.
+
+        A missing proposition is compiled as an empty and. A forall is compiled as (FORALL, 'forall', (body,), argument)
+        where body is the conjunction of its items; forall effects are not supported and are skipped.
+        """
+        if type(action_prop) is not ActionProposition:
+            return (self.PROPOSITION, 'and', ())
+        if action_prop.name == 'not' and len(action_prop.parameters) == 1 and type(action_prop.parameters[0]) is Predicate:
+            return self._compile_literal(action_prop.parameters[0], slots, RelationValue.FALSE)
+        if action_prop.name in ['and', 'or', 'not']:
+            return (self.PROPOSITION, action_prop.name, self._compile_items(action_prop.parameters, slots, allow_forall))
+        if action_prop.name == 'forall' and allow_forall:
+            inner_slots = dict(slots)
+            # The slot after all the slots in scope, even if the variable shadows one of them
+            inner_slots[action_prop.argument.name] = max(slots.values(), default=-1) + 1
+            items = action_prop.parameters
+            if len(items) == 1 and type(items[0]) is ActionProposition and items[0].name == 'and':
+                # (forall (?x) (and ...)) is the usual form, the body is that conjunction, not a conjunction around it
+                items = items[0].parameters
+            body = (self.PROPOSITION, 'and', self._compile_items(items, inner_slots, allow_forall))
+            return (self.FORALL, 'forall', (body,), action_prop.argument)
+        # TODO: forall effects
+        return None
+
+    def _compile_items(self, items, slots, allow_forall):
+        compiled_items = []
+        for item in items:
+            if type(item) is Predicate:
+                compiled_items.append(self._compile_literal(item, slots, RelationValue.TRUE))
+            elif type(item) is ActionProposition:
+                compiled = self._compile(item, slots, allow_forall)
+                if compiled is not None:
+                    compiled_items.append(compiled)
+        return tuple(compiled_items)
+
+    def _compile_literal(self, predicate, slots, value):
+        indices = []
+        for arg in predicate.arguments:
+            if arg.name not in slots:
+                raise ValueError("%s not found in list of parameters" % (arg.name))
+            indices.append(slots[arg.name])
+        return (self.LITERAL, predicate, tuple(indices), value)
+
+    def bind(self, parameters):
+        """A method that is used to put the entities of a dict of parameters in slot order
+
+        Parameters
+        ----------
+        parameters : dict
+            entities of the action indexed by parameter name
+
+        Returns
+        -------
+        tuple
+            entities in slot order
+        """
+        try:
+            return tuple([parameters[name] for name in self.parameters])
+        except KeyError as e:
+            raise KeyError("Parameter %s in action %s not found" % (e.args[0], self.name))
+
+    def ground(self, compiled, entities):
+        """A method that is used to ground compiled preconditions or effects
+
+        Parameters
+        ----------
+        compiled : tuple or None
+            preconditions or effects of the template
+        entities : tuple
+            entities in slot order, as returned by bind
+
+        Returns
+        -------
+        ActionProposition, Relation or None
+            the proposition made of relations between the entities, the forall propositions are ForallProposition
+        """
+        if compiled is None:
+            return None
+        if compiled[0] == self.LITERAL:
+            return Relation(compiled[1], [entities[i] for i in compiled[2]], compiled[3])
+        if compiled[0] == self.FORALL:
+            return ForallProposition(compiled[3], self, compiled[2][0], tuple(entities))
+        action_prop = ActionProposition(compiled[1], [])
+        parameters = action_prop.parameters
+        for item in compiled[2]:
+            if item[0] == self.LITERAL:
+                parameters.append(Relation(item[1], [entities[i] for i in item[2]], item[3]))
+            else:
+                parameters.append(self.ground(item, entities))
+        return action_prop
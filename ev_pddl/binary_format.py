@@ -0,0 +1,476 @@
+"""
+Compact binary format for Domain, Problem and WorldState.
+
+A file is made of:
+    header        magic b'EVPD', format version (uint16), kind (uint8), reserved (uint8)
+    string table  number of strings (uint32), size of the data (uint32), number of strings + 1 offsets (uint32),
+                  utf-8 data padded to 4 bytes
+    body          number of words (uint32), words (uint32)
+
+Every number is little-endian. The body is a flat sequence of integers in which names are indexes in the string table
+and facts are [predicate, value code, arity, entity indexes...]. Loading casts the body to an array of integers
+without copying it, so a buffer, an mmap or a memoryview can be loaded directly.
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+from ev_pddl.action_definition import ActionDefinition
+from ev_pddl.action_parameter import ActionParameter
+from ev_pddl.action_proposition import ActionProposition
+from ev_pddl.domain import Domain
+from ev_pddl.entity import Entity
+from ev_pddl.predicate import Predicate
+from ev_pddl.problem import Problem
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import VALUE_CODES, VALUES_BY_CODE
+from ev_pddl.types import Type
+from ev_pddl.world_state import WorldState
+
+
+MAGIC = b'EVPD'
+FORMAT_VERSION = 1
+
+KIND_DOMAIN = 1
+KIND_PROBLEM = 2
+KIND_WORLD_STATE = 3
+
+_HEADER = struct.Struct('<4sHBB')
+_UINT32 = struct.Struct('<I')
+_NONE = 0xFFFFFFFF
+
+# Tags of the nodes of the propositions of an action
+_NODE_NONE = 0
+_NODE_PROPOSITION = 1
+_NODE_PREDICATE = 2
+_NODE_LIST = 3
+
+# Kinds of requirements, the parser stores a single string
+_REQUIREMENTS_NONE = 0
+_REQUIREMENTS_STRING = 1
+_REQUIREMENTS_LIST = 2
+
+
+class _Writer:
+    """
+    A class used to build the string table and the body of a file.
+    """
+
+    __slots__ = ('strings', 'strings_index', 'words')
+
+    def __init__(self):
+        self.strings = []
+        self.strings_index = {}
+        self.words = array.array('I')
+
+    def string(self, value):
+        index = self.strings_index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings_index[value] = index
+            self.strings.append(value)
+        self.words.append(index)
+
+    def optional_string(self, value):
+        if value is None:
+            self.words.append(_NONE)
+        else:
+            self.string(value)
+
+    def int(self, value):
+        self.words.append(value)
+
+    def to_bytes(self, kind) -> bytes:
+        data = [s.encode('utf-8') for s in self.strings]
+        offsets = array.array('I', [0])
+        for item in data:
+            offsets.append(offsets[-1] + len(item))
+        blob = b''.join(data)
+        size = len(blob)
+        blob += b'\0' * (-size % 4)
+        words = self.words
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+            words = array.array('I', words)
+            words.byteswap()
+        return b''.join([
+            _HEADER.pack(MAGIC, FORMAT_VERSION, kind, 0),
+            _UINT32.pack(len(self.strings)),
+            _UINT32.pack(size),
+            offsets.tobytes(),
+            blob,
+            _UINT32.pack(len(words)),
+            words.tobytes(),
+        ])
+
+
+class _Reader:
+    """
+    A class used to read the string table and the body of a file from a memoryview.
+
+    The views on the buffer are kept in views and must be released with release once the file is decoded, an mmap
+    cannot be closed while a view on it exists.
+    """
+
+    __slots__ = ('kind', 'strings', 'words', 'position', 'views')
+
+    def __init__(self, buffer):
+        self.views = []
+        try:
+            self._read(buffer)
+        except BaseException:
+            self.release()
+            raise
+
+    def _read(self, buffer):
+        view = self._keep(memoryview(buffer).cast('B'))
+        if len(view) < _HEADER.size:
+            raise Exception("Not an ev_pddl binary file: too short")
+        magic, version, kind, _ = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise Exception("Not an ev_pddl binary file")
+        if version != FORMAT_VERSION:
+            raise Exception("Unsupported ev_pddl binary format version %s" % (version))
+        self.kind = kind
+        offset = _HEADER.size
+        self._check_length(view, offset + 8, "string table")
+        count, size = struct.unpack_from('<II', view, offset)
+        offset += 8
+        self._check_length(view, offset + 4 * (count + 1) + size + (-size % 4) + 4, "string table")
+        offsets = self._uint32_array(view, offset, count + 1)
+        offset += 4 * (count + 1)
+        self.strings = [str(view[offset + offsets[i]:offset + offsets[i + 1]], 'utf-8') for i in range(count)]
+        offset += size + (-size % 4)
+        length = _UINT32.unpack_from(view, offset)[0]
+        self._check_length(view, offset + 4 + 4 * length, "body")
+        self.words = self._uint32_array(view, offset + 4, length)
+        self.position = 0
+
+    def _keep(self, view):
+        self.views.append(view)
+        return view
+
+    @staticmethod
+    def _check_length(view, end, section):
+        if len(view) < end:
+            raise ValueError("Truncated ev_pddl binary file: the %s ends after the end of the file" % (section))
+
+    def _uint32_array(self, view, offset, length):
+        if length == 0:
+            return ()
+        if sys.byteorder == 'little':
+            return self._keep(view[offset:offset + 4 * length].cast('I'))
+        return struct.unpack_from('<%dI' % (length), view, offset)
+
+    def release(self):
+        """A method that is used to release the views on the buffer, the reader cannot be used afterwards
+        """
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+
+    def int(self) -> int:
+        value = self.words[self.position]
+        self.position += 1
+        return value
+
+    def string(self) -> str:
+        return self.strings[self.int()]
+
+    def optional_string(self):
+        index = self.int()
+        return None if index == _NONE else self.strings[index]
+
+
+def dumps(obj) -> bytes:
+    """A function that is used to encode a Domain, a Problem or a WorldState in the binary format
+
+    Parameters
+    ----------
+    obj : Domain, Problem or WorldState
+        object to encode
+    """
+    writer = _Writer()
+    if type(obj) is Domain:
+        _write_domain(writer, obj)
+        return writer.to_bytes(KIND_DOMAIN)
+    elif type(obj) is Problem:
+        writer.string(obj.problem_name)
+        writer.string(obj.domain.domain_name)
+        _write_facts(writer, obj.objects, obj.initial_state)
+        return writer.to_bytes(KIND_PROBLEM)
+    elif type(obj) is WorldState:
+        writer.string(obj.domain.domain_name)
+        _write_facts(writer, obj.entities, obj.relations)
+        return writer.to_bytes(KIND_WORLD_STATE)
+    raise TypeError("dumps: expected Domain, Problem or WorldState got %s" % (type(obj)))
+
+
+def loads(buffer, domain = None):
+    """A function that is used to decode an object encoded with dumps
+
+    The buffer is not copied: it can be bytes, a bytearray, a memoryview or an mmap. No view on the buffer is left
+    once the function returns or raises, so an mmap can be closed afterwards.
+
+    Parameters
+    ----------
+    buffer : bytes-like object
+        encoded object
+    domain : Domain, optional
+        domain of the problem or of the world state, it is not needed to decode a domain
+    """
+    reader = _Reader(buffer)
+    try:
+        return _decode(reader, domain)
+    finally:
+        reader.release()
+
+
+def _decode(reader, domain):
+    if reader.kind == KIND_DOMAIN:
+        return _read_domain(reader)
+    if reader.kind not in (KIND_PROBLEM, KIND_WORLD_STATE):
+        raise Exception("Unknown kind %s in ev_pddl binary file" % (reader.kind))
+    if domain is None:
+        raise Exception("loads: a domain is needed to decode a problem or a world state")
+    if reader.kind == KIND_PROBLEM:
+        name = reader.string()
+        _check_domain(reader.string(), domain)
+        problem = Problem(name, domain)
+        objects, relations = _read_facts(reader, domain)
+        problem.objects = objects
+        problem.initial_state = relations
+        return problem
+    _check_domain(reader.string(), domain)
+    world_state = WorldState(domain)
+    entities, relations = _read_facts(reader, domain)
+    world_state.entities = entities
+    world_state.relations = relations
+    return world_state
+
+
+def dump(obj, file):
+    """A function that is used to write an object in the binary format to a binary file object
+    """
+    file.write(dumps(obj))
+
+
+def load(filename, domain = None):
+    """A function that is used to load an object from a file in the binary format. The file is memory mapped.
+    """
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # mmap cannot map an empty file
+            raise ValueError("Truncated ev_pddl binary file: %s is empty" % (filename))
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return loads(data, domain)
+
+
+def _check_domain(name, domain):
+    if name != domain.domain_name:
+        raise Exception("The binary file was written for domain %s, not %s" % (name, domain.domain_name))
+
+
+def _write_facts(writer, entities, relations):
+    # The facts refer to the entities by position, an entity is found by name and type as two entities can have the
+    # same name with different types
+    indexes = {}
+    writer.int(len(entities))
+    for i, item in enumerate(entities):
+        indexes.setdefault((item.name, item.type.name), i)
+        writer.string(item.name)
+        writer.string(item.type.name)
+    writer.int(len(relations))
+    for item in relations:
+        writer.string(item.predicate.name)
+        writer.int(VALUE_CODES[item.value])
+        writer.int(len(item.entities))
+        for entity in item.entities:
+            index = indexes.get((entity.name, entity.type.name))
+            if index is None:
+                raise Exception("Entity %s of relation %s is not in the objects or entities, it cannot be written"
+                                % (entity.name, str(item)))
+            writer.int(index)
+
+
+def _read_facts(reader, domain):
+    entities = []
+    external = {}
+    for _ in range(reader.int()):
+        name = reader.string()
+        entities.append(Entity(name, _find_type(domain, external, reader.string())))
+    # The facts are the bulk of the file, they are read with local variables instead of the methods of the reader
+    words = reader.words
+    strings = reader.strings
+    position = reader.position
+    count = words[position]
+    position += 1
+    predicates = {}
+    relations = []
+    for _ in range(count):
+        predicate = predicates.get(words[position])
+        if predicate is None:
+            name = strings[words[position]]
+            predicate = domain.find_predicate(name)
+            if predicate is None:
+                raise Exception("Predicate %s not found in domain %s" % (name, domain.domain_name))
+            predicates[words[position]] = predicate
+        value = VALUES_BY_CODE[words[position + 1]]
+        end = position + 3 + words[position + 2]
+        relations.append(Relation(predicate, [entities[i] for i in words[position + 3:end]], value))
+        position = end
+    reader.position = position
+    return entities, relations
+
+
+def _write_domain(writer, domain):
+    writer.string(domain.domain_name)
+    requirements = domain.requirements if _has_requirements(domain) else None
+    if requirements is None:
+        writer.int(_REQUIREMENTS_NONE)
+    elif type(requirements) is str:
+        writer.int(_REQUIREMENTS_STRING)
+        writer.string(requirements)
+    else:
+        writer.int(_REQUIREMENTS_LIST)
+        writer.int(len(requirements))
+        for item in requirements:
+            writer.string(item)
+    writer.int(1 if domain.types and all(item.is_frozen() for item in domain.types) else 0)
+    writer.int(len(domain.types))
+    for item in domain.types:
+        writer.string(item.name)
+        writer.optional_string(item.extend.name if item.extend is not None else None)
+    writer.int(len(domain.predicates))
+    for item in domain.predicates:
+        writer.string(item.name)
+        writer.int(len(item.arguments))
+        for argument in item.arguments:
+            writer.string(argument.name)
+    writer.int(len(domain.actions))
+    for item in domain.actions:
+        writer.string(item.name)
+        writer.int(len(item.parameters))
+        for parameter in item.parameters:
+            writer.string(parameter.name)
+            writer.string(parameter.type.name)
+        _write_node(writer, item.preconditions)
+        _write_node(writer, item.effects)
+
+
+def _has_requirements(domain) -> bool:
+    try:
+        domain.requirements
+    except AttributeError:
+        return False
+    return True
+
+
+def _write_node(writer, node):
+    if node is None:
+        writer.int(_NODE_NONE)
+    elif type(node) is ActionProposition:
+        writer.int(_NODE_PROPOSITION)
+        writer.string(node.name)
+        if node.argument is not None:
+            writer.string(node.argument.name)
+            writer.string(node.argument.type.name)
+        else:
+            writer.int(_NONE)
+        writer.int(len(node.parameters))
+        for item in node.parameters:
+            _write_node(writer, item)
+    elif type(node) is Predicate:
+        writer.int(_NODE_PREDICATE)
+        writer.string(node.name)
+        writer.int(len(node.arguments))
+        for item in node.arguments:
+            writer.string(item.name)
+            writer.string(item.type.name)
+    elif type(node) is list:
+        writer.int(_NODE_LIST)
+        writer.int(len(node))
+        for item in node:
+            _write_node(writer, item)
+    else:
+        raise TypeError("Cannot encode %s in an action" % (type(node)))
+
+
+def _read_domain(reader):
+    domain = Domain(reader.string())
+    requirements_kind = reader.int()
+    if requirements_kind == _REQUIREMENTS_STRING:
+        domain.requirements = reader.string()
+    elif requirements_kind == _REQUIREMENTS_LIST:
+        domain.requirements = [reader.string() for _ in range(reader.int())]
+    frozen = reader.int()
+    types = []
+    parents = []
+    for _ in range(reader.int()):
+        types.append(Type(reader.string(), None))
+        parents.append(reader.optional_string())
+    index = {item.name: item for item in types}
+    # Types extended without being declared, e.g. the implicit object type
+    external = {}
+    for item, parent in zip(types, parents):
+        if parent is not None:
+            extend = index.get(parent)
+            if extend is None:
+                extend = external.setdefault(parent, Type(parent, None))
+            item.extend = extend
+    domain.types = types
+    predicates = []
+    for _ in range(reader.int()):
+        name = reader.string()
+        predicates.append(Predicate(name, [_find_type(domain, external, reader.string()) for _ in range(reader.int())]))
+    domain.predicates = predicates
+    actions = []
+    for _ in range(reader.int()):
+        name = reader.string()
+        parameters = []
+        for _ in range(reader.int()):
+            parameter_name = reader.string()
+            parameters.append(ActionParameter(parameter_name, _find_type(domain, external, reader.string())))
+        preconditions = _read_node(reader, domain, external)
+        effects = _read_node(reader, domain, external)
+        actions.append(ActionDefinition(name, parameters, preconditions, effects))
+    domain.actions = actions
+    if frozen:
+        domain.freeze_types()
+    return domain
+
+
+def _find_type(domain, external, name):
+    type_e = domain.find_type(name)
+    if type_e is None:
+        type_e = external.setdefault(name, Type(name, None))
+    return type_e
+
+
+def _read_node(reader, domain, external):
+    tag = reader.int()
+    if tag == _NODE_NONE:
+        return None
+    elif tag == _NODE_PROPOSITION:
+        name = reader.string()
+        argument_name = reader.optional_string()
+        argument = None
+        if argument_name is not None:
+            argument = ActionParameter(argument_name, _find_type(domain, external, reader.string()))
+        node = ActionProposition(name, [], argument=argument)
+        for _ in range(reader.int()):
+            node.add_parameter(_read_node(reader, domain, external))
+        return node
+    elif tag == _NODE_PREDICATE:
+        name = reader.string()
+        arguments = []
+        for _ in range(reader.int()):
+            argument_name = reader.string()
+            arguments.append(ActionParameter(argument_name, _find_type(domain, external, reader.string())))
+        return Predicate(name, arguments)
+    elif tag == _NODE_LIST:
+        return [_read_node(reader, domain, external) for _ in range(reader.int())]
+    raise Exception("Unknown node %s in ev_pddl binary file" % (tag))
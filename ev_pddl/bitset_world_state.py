@@ -0,0 +1,260 @@
+from ev_pddl.action_proposition import ActionProposition
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import RelationValue
+
+
+class FactTable:
+    """
+    A class used to give every ground fact (predicate, tuple of entities) of a Problem a dense integer id.
+
+    The facts of the initial state of the problem get the first ids, any other fact gets the next free id the first
+    time it is seen, so ids stay dense and never change. The same table must be shared by the states that are compared.
+
+    Attributes
+    ----------
+    problem : Problem
+        problem the facts belong to
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.__ids = {}
+        self.__facts = []
+        for item in problem.initial_state:
+            self.get_id(item)
+
+    def __len__(self):
+        return len(self.__facts)
+
+    def get_id(self, relation) -> int:
+        """A method that returns the id of the fact of a relation, assigning a new one if the fact was never seen
+
+        Parameters
+        ----------
+        relation : Relation
+            relation whose fact is looked up, its value is not taken into account
+        """
+        key = relation.key
+        fact_id = self.__ids.get(key)
+        if fact_id is None:
+            fact_id = len(self.__facts)
+            self.__ids[key] = fact_id
+            predicate = self.problem.domain.find_predicate(key[0])
+            if predicate is None:
+                predicate = relation.predicate
+            entities = []
+            for item in relation.entities:
+                entity = self.problem.find_objects(item.name)
+                entities.append(entity if entity is not None else item)
+            self.__facts.append((predicate, entities))
+        return fact_id
+
+    def find_id(self, relation):
+        """A method that returns the id of the fact of a relation, or None if the fact was never seen
+        """
+        return self.__ids.get(relation.key)
+
+    def get_fact(self, fact_id):
+        """A method that returns the fact of an id as a tuple (predicate, list of entities)
+        """
+        return self.__facts[fact_id]
+
+
+class BitsetWorldState:
+    """
+    A class used to represent a world state as bitsets over the facts of a FactTable.
+
+    There is one bitset for each RelationValue: bit i of the bitset of a value is set when fact i has that value, a
+    fact that is in none of them is not part of the state. Bitsets are Python integers, so membership tests, copies,
+    equality and hashing work on whole machine words instead of on Relation objects, and a copy costs nothing since
+    integers are immutable. This makes it cheap to keep many states around, e.g. for lookahead.
+
+    Attributes
+    ----------
+    fact_table : FactTable
+        table that gives the id of the facts
+    """
+
+    __slots__ = ('fact_table', '__bits')
+
+    _VALUES = (RelationValue.TRUE, RelationValue.FALSE, RelationValue.PENDING_TRUE, RelationValue.PENDING_FALSE)
+
+    def __init__(self, fact_table, bits = None):
+        self.fact_table = fact_table
+        self.__bits = dict(bits) if bits is not None else {value: 0 for value in self._VALUES}
+
+    @classmethod
+    def from_problem(cls, problem, fact_table = None):
+        """A method that is used to build the state of the initial state of a problem
+        """
+        if fact_table is None:
+            fact_table = FactTable(problem)
+        return cls._from_relations(fact_table, problem.initial_state)
+
+    @classmethod
+    def from_world_state(cls, world_state, fact_table):
+        """A method that is used to build the state of the relations of a WorldState
+        """
+        return cls._from_relations(fact_table, world_state.relations)
+
+    @classmethod
+    def _from_relations(cls, fact_table, relations):
+        """A method that is used to build a state from relations in O(relations). If a fact appears more than once,
+        the last relation wins, as with set_value.
+
+        The bits are first set in one bytearray per value, and each bitset is then built once: setting the bits one
+        at a time on integers would copy the whole bitset for each relation.
+        """
+        values = {}
+        for item in relations:
+            values[fact_table.get_id(item)] = item.value
+        size = len(fact_table) // 8 + 1
+        masks = {value: bytearray(size) for value in cls._VALUES}
+        for fact_id, value in values.items():
+            masks[value][fact_id >> 3] |= 1 << (fact_id & 7)
+        return cls(fact_table, {value: int.from_bytes(mask, 'little') for value, mask in masks.items()})
+
+    def to_relations(self) -> list:
+        """A method that returns the facts of the state as new Relation objects, ordered by fact id
+        """
+        values = {}
+        for value in self._VALUES:
+            bits = self.__bits[value]
+            while bits:
+                low = bits & -bits
+                values[low.bit_length() - 1] = value
+                bits ^= low
+        relations = []
+        for fact_id in sorted(values):
+            predicate, entities = self.fact_table.get_fact(fact_id)
+            relations.append(Relation(predicate, list(entities), values[fact_id]))
+        return relations
+
+    def get_value(self, relation):
+        """A method that returns the value of the fact of a relation in this state, or None if it is not in the state
+        """
+        fact_id = self.fact_table.find_id(relation)
+        if fact_id is None:
+            return None
+        mask = 1 << fact_id
+        for value in self._VALUES:
+            if self.__bits[value] & mask:
+                return value
+        return None
+
+    def find_relation(self, relation) -> bool:
+        """A method that returns True if the fact of the relation has the value of the relation in this state
+        """
+        fact_id = self.fact_table.find_id(relation)
+        if fact_id is None:
+            return False
+        return bool(self.__bits[relation.value] >> fact_id & 1)
+
+    def set_value(self, relation, value):
+        """A method that is used to set the value of the fact of a relation, adding the fact if needed
+        """
+        mask = 1 << self.fact_table.get_id(relation)
+        for item in self._VALUES:
+            self.__bits[item] &= ~mask
+        self.__bits[value] |= mask
+
+    def get_bits(self, value) -> int:
+        """A method that returns the bitset of a RelationValue
+        """
+        return self.__bits[value]
+
+    def can_action_be_applied(self, action) -> bool:
+        """A method that is used to check the preconditions of an Action against this state
+        """
+        return self._check_precondition_recursive(action.preconditions)
+
+    def _check_precondition_recursive(self, action_proposition):
+        if type(action_proposition) is Relation:
+            return self.find_relation(action_proposition)
+        if action_proposition.name == 'and':
+            masks = self._masks(action_proposition.parameters)
+            if masks is None:
+                return False
+            for value, mask in masks.items():
+                if self.__bits[value] & mask != mask:
+                    return False
+            for item in action_proposition.parameters:
+                if isinstance(item, ActionProposition) and not self._check_precondition_recursive(item):
+                    return False
+            return True
+        elif action_proposition.name == 'or':
+            for item in action_proposition.parameters:
+                if self._check_precondition_recursive(item):
+                    return True
+            return False
+        elif action_proposition.name == 'forall':
+            # The variable takes the values of the objects of the problem
+            for entity in self.fact_table.problem.find_objects_with_type(action_proposition.argument.type):
+                if not self._check_precondition_recursive(action_proposition.ground_body(entity)):
+                    return False
+            return True
+        return False
+
+    def _masks(self, items):
+        """A method that returns, for each value, the bitset of the relations in items that need that value.
+        Returns None if one of the relations is a fact that was never seen, so it cannot be satisfied.
+        """
+        masks = {}
+        for item in items:
+            if type(item) is Relation:
+                fact_id = self.fact_table.find_id(item)
+                if fact_id is None:
+                    return None
+                masks[item.value] = masks.get(item.value, 0) | (1 << fact_id)
+        return masks
+
+    def apply_action(self, action, check_action_can_apply = True) -> list:
+        """A method that is used to apply the effects of an Action to this state
+
+        Returns
+        -------
+        changed_relations : list
+            list of relations that were changed by applying the action
+        """
+        if check_action_can_apply and not self.can_action_be_applied(action):
+            return []
+        effects = action.effects
+        relations = [effects] if type(effects) is Relation else [item for item in effects.parameters if type(item) is Relation]
+        changed = 0
+        new_bits = {}
+        values = {}
+        for item in relations:
+            # As in WorldState, the last effect on a fact wins
+            values[self.fact_table.get_id(item)] = item.value
+        for fact_id, value in values.items():
+            mask = 1 << fact_id
+            changed |= mask
+            new_bits[value] = new_bits.get(value, 0) | mask
+        for value in self._VALUES:
+            self.__bits[value] = (self.__bits[value] & ~changed) | new_bits.get(value, 0)
+        return relations
+
+    def copy(self):
+        """A method that returns a copy of this state, sharing the same FactTable
+        """
+        return BitsetWorldState(self.fact_table, self.__bits)
+
+    def __len__(self):
+        total = 0
+        for value in self._VALUES:
+            total |= self.__bits[value]
+        return bin(total).count('1')
+
+    def __eq__(self, other):
+        return (self.__class__ == other.__class__ and
+                self.fact_table is other.fact_table and
+                all(self.__bits[value] == other.get_bits(value) for value in self._VALUES))
+
+    def __hash__(self):
+        return hash(tuple(self.__bits[value] for value in self._VALUES))
+
+    def __str__(self) -> str:
+        string = "Relations: \n"
+        for item in self.to_relations():
+            string += "\t%s\n " % (str(item))
+        return string
@@ -1,13 +1,19 @@
 from ev_pddl.predicate import Predicate
 from ev_pddl.types import Type
+from ev_pddl.action_definition import ActionDefinition
+from types import MappingProxyType
 
 class Domain:
 
     def __init__(self, name = ''):
         self.__domain_name = name
         self.__types = []
+        self.__types_index = {}
         self.__predicates = []
+        self.__predicates_index = {}
         self.__actions = []
+        self.__actions_index = {}
+        self.__version = 0
 
     #-----------------------------------
     #       Name methods
@@ -26,6 +32,13 @@ class Domain:
         """
         self.__domain_name = name
     
+    @property
+    def version(self):
+        """
+        Getter for the version of the domain, it changes every time types, predicates or actions are changed
+        """
+        return self.__version
+
     #-----------------------------------
     #       Requirements methods
     #-----------------------------------
@@ -61,15 +74,36 @@ class Domain:
         Setter for the actions of the domain
         """
         self.__actions = actions
+        self.__version += 1
+        self.__actions_index = {}
+        for item in actions:
+            self.__actions_index.setdefault(item.name.casefold(), item)
     
     def find_action_with_name(self, name):
         """
-        Find action with name
+        Find action with name, ignoring the case of the name
+        """
+        return self.__actions_index.get(name.casefold())
+
+    def add_action(self, action):
+        """
+        Add action to the list of actions
         """
-        for action in self.actions:
-            if action.name.lower() == name.lower():
-                return action
-        return None
+        if type(action) is not ActionDefinition:
+            raise Exception('action type must be ActionDefinition')
+
+        if self.find_action_with_name(action.name) is not None:
+            raise Exception('Action with name %s already exists'%(action.name))
+
+        self.__actions.append(action)
+        self.__version += 1
+        self.__actions_index[action.name.casefold()] = action
+
+    def get_dict_actions(self):
+        """
+        Read-only view of the actions of the domain indexed by their case-folded name
+        """
+        return MappingProxyType(self.__actions_index)
     
     #-----------------------------------
     #       Types methods
@@ -91,15 +125,22 @@ class Domain:
             raise Exception("Types must be a list")
 
         self.__types = types
+        self.__version += 1
+        self.__types_index = {}
+        for item in types:
+            self.__types_index.setdefault(item.name, item)
 
     def find_type(self, type_name):
         """
         Find type within the list of types
         """
-        for type in self.types:
-            if type.name == type_name:
-                return type
-        return None
+        return self.__types_index.get(type_name)
+
+    def get_dict_types(self):
+        """
+        Read-only view of the types of the domain indexed by name
+        """
+        return MappingProxyType(self.__types_index)
     
     def add_type(self, type_d):
         """
@@ -113,7 +154,26 @@ class Domain:
             raise Exception('Cannot add 2 Type to the domain with the same name: %s'%(type_d.name))
        
         self.__types.append(type_d)
+        self.__version += 1
+        self.__types_index[type_d.name] = type_d
         
+    def freeze_types(self):
+        """
+        Freeze the hierarchy of all the types of the domain, so that subtype checks don't walk the hierarchy anymore
+        """
+        for item in self.__types:
+            item.freeze()
+
+    def is_subtype(self, type_a, type_b):
+        """
+        Returns True if type_a is type_b or extends it. Both can be a Type or the name of a type of the domain.
+        """
+        if type(type_a) is str:
+            type_a = self.find_type(type_a)
+            if type_a is None:
+                return False
+        return type_a.is_subtype(type_b)
+
     #-----------------------------------
     #       Predicates methods
     #-----------------------------------    
@@ -131,15 +191,22 @@ class Domain:
         Setter for the predicates of the domain
         """
         self.__predicates = predicates
+        self.__version += 1
+        self.__predicates_index = {}
+        for item in predicates:
+            self.__predicates_index.setdefault(item.name, item)
     
     def find_predicate(self, predicate_name):
         """
         Find predicate in the list of predicates based on the name and return the object type Predicate. If it's not found return None.
         """
-        for item in self.predicates:
-            if item.name == predicate_name:
-                return item
-        return None
+        return self.__predicates_index.get(predicate_name)
+
+    def get_dict_predicates(self):
+        """
+        Read-only view of the predicates of the domain indexed by name
+        """
+        return MappingProxyType(self.__predicates_index)
     
     def add_predicate(self, predicate):
         """
@@ -152,6 +219,8 @@ class Domain:
             raise Exception('Predicate with name %s already exists'%(predicate.name))
 
         self.__predicates.append(predicate)
+        self.__version += 1
+        self.__predicates_index[predicate.name] = predicate
     
     def __str__(self) -> str:
         string = "Domain Name: %s" %(self.domain_name) + '\n' 
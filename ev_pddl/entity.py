@@ -13,6 +13,8 @@ class Entity:
         The type of the entity.
     """
 
+    __slots__ = ('name', 'type')
+
     def __init__(self, name, type_e, problem=None):
         self.name = name
         if type(type_e) is not Type:
@@ -40,10 +42,15 @@ class Entity:
         # return (name, type_e)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (self.__class__ == other.__class__ and
                 self.name == other.name and
                 self.type == other.type
                 )
+
+    def __hash__(self):
+        return hash((self.name, self.type.name))
     
     def to_PDDL(self):
         """A method that is used to transform the entity to PDDL
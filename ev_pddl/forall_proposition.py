@@ -0,0 +1,87 @@
+from ev_pddl.action_proposition import ActionProposition
+from ev_pddl.entity import Entity
+
+
+class ForallProposition(ActionProposition):
+    """
+    A class used to represent a grounded forall precondition.
+
+    The quantified variable cannot be substituted when the action is grounded, because its values are the entities of
+    the world state the action is checked against. The body is kept compiled, together with the entities of the
+    parameters of the action, and is grounded for one value of the variable at a time with ground_body.
+
+    Attributes
+    ----------
+    argument : ActionParameter
+        quantified variable, its type gives the entities the body is checked for
+    template : ActionTemplate
+        template the body was compiled by
+    body : tuple
+        compiled body, a conjunction in which the variable is the slot after the parameters of the action
+    entities : tuple
+        entities of the parameters of the action, in slot order
+    """
+
+    __slots__ = ('template', 'body', 'entities')
+
+    def __init__(self, argument, template, body, entities):
+        super().__init__('forall', [], argument=argument)
+        self.template = template
+        self.body = body
+        self.entities = entities
+
+    def ground_body(self, entity):
+        """A method that is used to ground the body for one value of the quantified variable
+
+        Parameters
+        ----------
+        entity : Entity
+            value of the variable
+
+        Returns
+        -------
+        ActionProposition
+            the body made of relations
+        """
+        body = self.template.ground(self.body, self.entities + (entity,))
+        if self.is_frozen():
+            body.freeze()
+        return body
+
+    def freeze(self):
+        """A method that is used to make the forall proposition immutable, so that it can be shared
+
+        The parameters become a tuple, the entities stay a tuple and the body is compiled, so it cannot be changed. The
+        bodies returned by ground_body are frozen as well.
+        """
+        super().freeze()
+        self.entities = tuple(self.entities)
+
+    def is_frozen(self):
+        """A method that returns True if the forall proposition is frozen
+        """
+        return type(self.parameters) is tuple
+
+    def _lifted_body(self):
+        return self.ground_body(Entity(self.argument.name, self.argument.type))
+
+    def __str__(self):
+        return 'forall(%s): (%s)' % (self.argument.name, str(self._lifted_body()))
+
+    def __eq__(self, other):
+        return (
+            self.__class__ == other.__class__ and
+            self.argument == other.argument and
+            self.body == other.body and
+            self.entities == other.entities
+        )
+
+    def to_PDDL(self):
+        """A method that is used to transform the forall proposition to PDDL, the variable is left as is
+
+        Returns
+        -------
+        String
+            PDDL representation of the forall proposition
+        """
+        return ActionProposition('forall', [self._lifted_body()], argument=self.argument).to_PDDL()
@@ -0,0 +1,143 @@
+from ev_pddl.action_enumerator import ActionEnumerator
+from ev_pddl.action_template import ActionTemplate
+
+
+class IncrementalMatcher:
+    """
+    A class used to keep the set of applicable actions of a WorldState up to date as the world state changes.
+
+    The matcher enumerates the applicable actions once and then updates them with the relations that changed: the
+    actions that were matched through a changed relation whose new value doesn't match anymore are dropped, and the
+    literals that the changed relation now matches are joined with the rest of the world state, starting from that
+    relation, to find the new applicable actions. The work done is proportional to the change, not to the size of the
+    world. Two cases fall back to enumerating a whole action again: actions whose preconditions have parts that are not
+    literals of the top-level conjunction (or, nested propositions, forall) when a predicate of those parts changes, and
+    actions with parameters that no literal binds or with a forall precondition when an entity is added.
+
+    Once created the matcher is attached to the world state, which updates it on every change.
+
+    Attributes
+    ----------
+    world_state : WorldState
+        world state that is tracked
+    action_definitions : list
+        definitions of the actions that are tracked
+    """
+
+    def __init__(self, world_state, action_definitions = None, action_cache = None):
+        self.world_state = world_state
+        if action_definitions is None:
+            action_definitions = list(world_state.domain.actions)
+        self.action_definitions = action_definitions
+        self.__enumerator = ActionEnumerator(world_state.domain, action_cache)
+        self.__literal_index = {}
+        self.__residual_index = {}
+        self.__unbound_actions = []
+        for action_definition in action_definitions:
+            literals, residual = self.__enumerator.get_literals(action_definition)
+            covered = set()
+            for i, literal in enumerate(literals):
+                self.__literal_index.setdefault(literal[1].name, []).append((action_definition, i))
+                covered.update(literal[2])
+            if residual:
+                for name in self._residual_predicates(action_definition.get_template().preconditions, literals):
+                    self.__residual_index.setdefault(name, []).append(action_definition)
+            if len(covered) < len(action_definition.parameters) or self._has_forall(action_definition.get_template().preconditions):
+                self.__unbound_actions.append(action_definition)
+        self.reset()
+        world_state.attach_matcher(self)
+
+    def get_applicable_actions(self) -> list:
+        """A method that returns the actions that can currently be applied to the world state
+        """
+        return [item[0] for groundings in self.__applicable.values() for item in groundings.values()]
+
+    def reset(self):
+        """A method that is used to enumerate again all the applicable actions, e.g. after the relations of the world
+        state were replaced
+        """
+        self.__applicable = {item.name: {} for item in self.action_definitions}
+        self.__support = {}
+        for action_definition in self.action_definitions:
+            self._recompute(action_definition)
+
+    def update(self, relations):
+        """A method that is used to update the applicable actions after some relations changed
+
+        Parameters
+        ----------
+        relations : list of Relation
+            relations that were added to the world state, removed from it or whose value changed
+        """
+        recompute = {}
+        for relation in relations:
+            current = self.world_state.find_relation(relation, exclude_value=True)
+            if current is None:
+                # The relation was removed, e.g. by a rollback, so no literal can match it anymore
+                for grounding in list(self.__support.get(relation.key, {})):
+                    self._remove(grounding)
+                for action_definition in self.__residual_index.get(relation.key[0], ()):
+                    recompute[action_definition.name] = action_definition
+                continue
+            key = current.key
+            for grounding, value in list(self.__support.get(key, {}).items()):
+                if value != current.value:
+                    self._remove(grounding)
+            for action_definition, i in self.__literal_index.get(key[0], ()):
+                for action in self.__enumerator.applicable_actions_with_relation(self.world_state, action_definition, i, current):
+                    self._add(action_definition, action)
+            for action_definition in self.__residual_index.get(key[0], ()):
+                recompute[action_definition.name] = action_definition
+        for action_definition in recompute.values():
+            self._recompute(action_definition)
+
+    def entity_added(self, entity):
+        """A method that is used to update the applicable actions after an entity was added to the world state
+        """
+        for action_definition in self.__unbound_actions:
+            self._recompute(action_definition)
+
+    def _recompute(self, action_definition):
+        for grounding in list(self.__applicable[action_definition.name]):
+            self._remove(grounding)
+        for action in self.__enumerator.applicable_actions(self.world_state, [action_definition]):
+            self._add(action_definition, action)
+
+    def _grounding(self, action):
+        return (action.name, tuple(item.name for item in action.parameters.values()))
+
+    def _add(self, action_definition, action):
+        grounding = self._grounding(action)
+        groundings = self.__applicable[grounding[0]]
+        if grounding in groundings:
+            return
+        entities = tuple(action.parameters.values())
+        support = []
+        for _, predicate, slots, value in self.__enumerator.get_literals(action_definition)[0]:
+            key = (predicate.name, tuple(entities[slot].name for slot in slots))
+            self.__support.setdefault(key, {})[grounding] = value
+            support.append(key)
+        groundings[grounding] = (action, support)
+
+    def _remove(self, grounding):
+        item = self.__applicable[grounding[0]].pop(grounding, None)
+        if item is None:
+            return
+        for key in item[1]:
+            bucket = self.__support.get(key)
+            if bucket is not None:
+                bucket.pop(grounding, None)
+                if not bucket:
+                    del self.__support[key]
+
+    def _has_forall(self, compiled):
+        if compiled is None or compiled[0] == ActionTemplate.LITERAL:
+            return False
+        return compiled[0] == ActionTemplate.FORALL or any(self._has_forall(item) for item in compiled[2])
+
+    def _residual_predicates(self, compiled, literals):
+        names = set()
+        for literal in self.__enumerator.iter_literals(compiled):
+            if not any(literal is item for item in literals):
+                names.add(literal[1].name)
+        return names
@@ -0,0 +1,228 @@
+import functools
+import hashlib
+import io
+import logging
+import os
+import pickle
+import tempfile
+
+import ev_pddl
+from ev_pddl.action_definition import ActionDefinition
+from ev_pddl.domain import Domain
+from ev_pddl.predicate import Predicate
+from ev_pddl.problem import Problem
+from ev_pddl.relation import Relation
+from ev_pddl.types import Type
+
+
+@functools.lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """A function that returns a hash of the sources of the ev_pddl package, computed once.
+
+    The layout of the pickled objects changes with the code, so the hash is part of the keys of PDDLCache: an entry
+    written by another version of the code is never loaded, even if __version__ was not changed.
+    """
+    root = os.path.dirname(os.path.abspath(ev_pddl.__file__))
+    digest = hashlib.sha256()
+    for directory, directories, files in os.walk(root):
+        directories.sort()
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, root).encode() + b'\0')
+                with open(path, 'rb') as f:
+                    digest.update(f.read() + b'\0')
+    return digest.hexdigest()
+
+
+def _has_layout(obj, cls, attributes) -> bool:
+    """A function that returns True if obj is an instance of cls with all the attributes the current code expects
+    """
+    return type(obj) is cls and all(hasattr(obj, name) for name in attributes)
+
+
+class _ProblemPickler(pickle.Pickler):
+    """
+    Pickler that writes references to the domain, its types and its predicates instead of copies of them,
+    so that a Problem can be loaded back against the Domain that is already in memory.
+    """
+
+    def __init__(self, file, domain):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.__domain = domain
+
+    def persistent_id(self, obj):
+        if obj is self.__domain:
+            return ('domain',)
+        if type(obj) is Type and self.__domain.find_type(obj.name) is obj:
+            return ('type', obj.name)
+        if type(obj) is Predicate and self.__domain.find_predicate(obj.name) is obj:
+            return ('predicate', obj.name)
+        return None
+
+
+class _ProblemUnpickler(pickle.Unpickler):
+    """
+    Unpickler that resolves the references written by _ProblemPickler against a Domain.
+    """
+
+    def __init__(self, file, domain):
+        super().__init__(file)
+        self.__domain = domain
+
+    def persistent_load(self, pid):
+        if pid[0] == 'domain':
+            return self.__domain
+        if pid[0] == 'type':
+            item = self.__domain.find_type(pid[1])
+        elif pid[0] == 'predicate':
+            item = self.__domain.find_predicate(pid[1])
+        else:
+            raise pickle.UnpicklingError('Unknown persistent id %s' % (str(pid)))
+        if item is None:
+            raise pickle.UnpicklingError('%s %s not found in domain %s' % (pid[0], pid[1], self.__domain.domain_name))
+        return item
+
+
+def dumps_problem(problem):
+    """A function that is used to serialize a Problem without its Domain
+
+    Parameters
+    ----------
+    problem : Problem
+        problem to serialize
+
+    Returns
+    -------
+    bytes
+        serialized problem. The domain, its types and its predicates are stored as references.
+    """
+    buffer = io.BytesIO()
+    _ProblemPickler(buffer, problem.domain).dump(problem)
+    return buffer.getvalue()
+
+
+def loads_problem(data, domain):
+    """A function that is used to load a Problem serialized with dumps_problem
+
+    Parameters
+    ----------
+    data : bytes
+        serialized problem
+    domain : Domain
+        domain of the problem, it needs to be equivalent to the one the problem was serialized with
+
+    Returns
+    -------
+    Problem
+        problem that uses the types and the predicates of domain
+    """
+    return _ProblemUnpickler(io.BytesIO(data), domain).load()
+
+
+class PDDLCache:
+    """
+    A class used to keep parsed domains and problems on disk.
+
+    Entries are keyed on a hash of the content of the PDDL file and of the sources of the library, see
+    code_fingerprint, so an entry is never used for a file that changed or that was parsed by different code. Broken
+    entries, and entries whose objects don't have the attributes the current code expects, are ignored and rebuilt.
+
+    Attributes
+    ----------
+    cache_dir : str
+        directory where the entries are stored
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, content, *parents):
+        """A method that is used to compute the key of an entry
+
+        Parameters
+        ----------
+        content : bytes
+            content of the PDDL file
+        parents : str
+            keys of the entries the new entry depends on, e.g. the domain of a problem
+
+        Returns
+        -------
+        str
+            hexadecimal key
+        """
+        digest = hashlib.sha256()
+        digest.update(ev_pddl.__version__.encode())
+        digest.update(b'\0' + code_fingerprint().encode())
+        for item in parents:
+            digest.update(b'\0' + item.encode())
+        digest.update(b'\0' + content)
+        return digest.hexdigest()
+
+    def load_domain(self, key):
+        """A method that is used to load a Domain. Returns None if there is no valid entry for the key.
+        """
+        data = self._read('domain', key)
+        if data is None:
+            return None
+        try:
+            domain = pickle.loads(data)
+        except Exception as e:
+            logging.info("PDDLCache.load_domain(%s) -> Broken entry, it will be rebuilt: %s" % (key, str(e)))
+            return None
+        if not (_has_layout(domain, Domain, vars(Domain())) and
+                all(_has_layout(item, ActionDefinition, ActionDefinition.__slots__) for item in domain.actions)):
+            logging.info("PDDLCache.load_domain(%s) -> Entry written by another version, it will be rebuilt" % (key))
+            return None
+        return domain
+
+    def store_domain(self, key, domain):
+        """A method that is used to store a Domain under a key
+        """
+        self._write('domain', key, pickle.dumps(domain, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def load_problem(self, key, domain):
+        """A method that is used to load a Problem against its domain. Returns None if there is no valid entry for the key.
+        """
+        data = self._read('problem', key)
+        if data is None:
+            return None
+        try:
+            problem = loads_problem(data, domain)
+        except Exception as e:
+            logging.info("PDDLCache.load_problem(%s) -> Broken entry, it will be rebuilt: %s" % (key, str(e)))
+            return None
+        if not (_has_layout(problem, Problem, vars(Problem('', domain))) and
+                all(_has_layout(item, Relation, Relation.__slots__) for item in problem.initial_state[:1])):
+            logging.info("PDDLCache.load_problem(%s) -> Entry written by another version, it will be rebuilt" % (key))
+            return None
+        return problem
+
+    def store_problem(self, key, problem):
+        """A method that is used to store a Problem under a key
+        """
+        self._write('problem', key, dumps_problem(problem))
+
+    def _path(self, kind, key):
+        return os.path.join(self.cache_dir, '%s-%s.pickle' % (kind, key))
+
+    def _read(self, kind, key):
+        try:
+            with open(self._path(kind, key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, kind, key, data):
+        # Write to a temporary file first, so that concurrent workers never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(kind, key))
+        except OSError as e:
+            logging.info("PDDLCache._write(%s) -> Cannot write entry: %s" % (key, str(e)))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -9,6 +9,8 @@ class Predicate:
     arguments: list of Argument
         The arguments of the predicate.
     """
+
+    __slots__ = ('name', 'arguments')
     
     def __init__(self, name, arguments):
         self.name = name
@@ -26,12 +28,17 @@ class Predicate:
 
 
     def __eq__(self, other): 
+        if self is other:
+            return True
         return (
             self.__class__ == other.__class__ and 
             self.name == other.name 
             # and all(map(lambda x, y: x == y, self.arguments, other.arguments))
         )
 
+    def __hash__(self):
+        return hash(self.name)
+
     def __repr__(self):
         string= "Predicate: %s " % (self.name)
         for item in self.arguments:
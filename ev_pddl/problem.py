@@ -6,13 +6,15 @@ class Problem:
     
     """
     
-    def __init__(self, name, domain, objects = [], initial_state = []):
+    def __init__(self, name, domain, objects = None, initial_state = None):
         self.problem_name = name
         if type(domain) is not Domain:
             raise Exception("Domain in problem was expecting type Domain got %s"%(type(domain)))
         self.domain = domain
-        self.__objects = objects
-        self.__initial_state = initial_state
+        self.__interned_entities = {}
+        self.__interned_predicates = {}
+        self.objects = objects if objects is not None else []
+        self.__initial_state = initial_state if initial_state is not None else []
 
     @property
     def objects(self):
@@ -27,21 +29,57 @@ class Problem:
         Setter for objects
         """
         self.__objects = objects
+        self.__objects_index = {}
+        self.__objects_by_type = {}
+        self.__objects_by_exact_type = {}
+        for item in objects:
+            if item.name.casefold() not in self.__objects_index:
+                self._index_object(item)
+
+    def _index_object(self, obj):
+        """
+        Register an object in the name index and in the type indexes, under its type and all the types it extends
+        """
+        key = obj.name.casefold()
+        obj = self.intern_entity(obj)
+        self.__objects_index[key] = obj
+        for type_name in obj.type.get_list_extensions():
+            self.__objects_by_type.setdefault(type_name, {})[key] = obj
+        self.__objects_by_exact_type.setdefault(obj.type.name, {})[key] = obj
     
     def add_object(self, obj):
         if self.find_objects(obj.name) is not None:
             raise AttributeError('Object %s in the problem already exists'%(obj.name))
+        obj = self.intern_entity(obj)
         self.__objects.append(obj)
+        self._index_object(obj)
     
     def find_objects(self, obj_name):
-        # if '.' in obj_name:
-        #     obj_name = '.'.join(map(lambda s: s.strip().capitalize(), obj_name.split('.')))
-        #     obj_name = obj_name[0].lower() + obj_name[1:]
-        for item in self.__objects:
-            if item.name.lower() == obj_name.lower():
-                return item
-        return None
+        """
+        Find the object with the given name, ignoring the case of the name. Returns None if it is not found.
+        """
+        return self.__objects_index.get(obj_name.casefold())
     
+    def intern_entity(self, entity):
+        """
+        Returns the canonical instance of an entity for this problem, registering the entity if no equal one was
+        interned before. Equal entities interned in the same problem are the same object.
+        """
+        return self.__interned_entities.setdefault(entity, entity)
+
+    def intern_predicate(self, predicate):
+        """
+        Returns the canonical instance of a predicate for this problem. The predicate of the domain with the same name
+        is used when it exists, otherwise the predicate is registered as canonical instance.
+        """
+        item = self.__interned_predicates.get(predicate)
+        if item is None:
+            item = self.domain.find_predicate(predicate.name)
+            if item is None:
+                item = predicate
+            self.__interned_predicates[item] = item
+        return item
+
     @property
     def initial_state(self):
         """
@@ -78,13 +116,30 @@ class Problem:
             string += "\t%s\n "%(str(item))
         return string
     
-    def find_objects_with_type(self, type_e, exclude_types = []):
-        return_list = []
-        for item in self.objects:
-            if type_e in item.type.get_list_extensions():
-                if item.type not in exclude_types:
-                    return_list.append(item)
-        return return_list
+    def find_objects_with_type(self, type_e, exclude_types = None):
+        """
+        Find the objects whose type is type_e or extends it.
+
+        Parameters
+        ----------
+        type_e : Type or str
+            type, or name of the type, of the objects
+        exclude_types : list, optional
+            list of types, or names of types, whose objects are left out. Only the exact type of the object is checked.
+        """
+        if type(type_e) is not str:
+            type_e = type_e.name
+        bucket = self.__objects_by_type.get(type_e)
+        if bucket is None:
+            return []
+        if not exclude_types:
+            return list(bucket.values())
+        excluded = set()
+        for item in exclude_types:
+            if type(item) is not str:
+                item = item.name
+            excluded.update(self.__objects_by_exact_type.get(item, ()))
+        return [obj for key, obj in bucket.items() if key not in excluded]
     
     def __eq__(self, other):
         return (self.__class__ == other.__class__ and
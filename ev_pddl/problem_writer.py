@@ -0,0 +1,64 @@
+import io
+
+from ev_pddl.relation_value import RelationValue
+
+
+def write_problem(problem, stream, goal = None):
+    """A function that is used to write a Problem as a PDDL problem file
+
+    The objects are written grouped by type, one line per type, and the :init block lists the relations whose value
+    is TRUE in the standard (predicate entity ...) form, so the output can be read back with PDDL_Parser.parse_problem
+    or by external planners.
+
+    Parameters
+    ----------
+    problem : Problem
+        problem to write
+    stream : file object
+        text stream where the problem is written
+    goal : str, optional
+        PDDL goal proposition, by default the empty goal (and)
+    """
+    _write(stream, problem.problem_name, problem.domain.domain_name, problem.objects, problem.initial_state, goal)
+
+
+def write_world_state(world_state, stream, problem_name, goal = None):
+    """A function that is used to write a WorldState as a PDDL problem file, e.g. to checkpoint it or to send it to a planner
+
+    The entities of the world state are the objects of the problem and its TRUE relations are the initial state.
+    The relations with another value are not written, PDDL has no way to express them.
+
+    Parameters
+    ----------
+    world_state : WorldState
+        world state to write
+    stream : file object
+        text stream where the problem is written
+    problem_name : str
+        name of the problem
+    goal : str, optional
+        PDDL goal proposition, by default the empty goal (and)
+    """
+    _write(stream, problem_name, world_state.domain.domain_name, world_state.entities,
+           world_state.get_relations(value_list=[RelationValue.TRUE]), goal)
+
+
+def problem_to_string(problem, goal = None) -> str:
+    """A function that returns the PDDL problem file of a Problem as a string, see write_problem
+    """
+    stream = io.StringIO()
+    write_problem(problem, stream, goal)
+    return stream.getvalue()
+
+
+def _write(stream, problem_name, domain_name, objects, relations, goal):
+    stream.write("(define (problem %s)\n    (:domain %s)\n\n    (:objects\n" % (problem_name, domain_name))
+    # The objects without type come first, the parser keeps the last type seen for a line ending with "- object"
+    objects_by_type = {'object': []}
+    for item in objects:
+        objects_by_type.setdefault(item.type.name, []).append(item.name)
+    stream.writelines("        %s - %s\n" % (" ".join(names), type_name) for type_name, names in objects_by_type.items() if names)
+    stream.write("    )\n\n    (:init\n")
+    stream.writelines("        (%s)\n" % (" ".join([item.predicate.name] + [entity.name for entity in item.entities]))
+                      for item in relations if item.value == RelationValue.TRUE)
+    stream.write("    )\n\n    (:goal %s)\n)\n" % (goal if goal is not None else "(and)"))
@@ -17,6 +17,9 @@ class Relation:
         The value of the relation.
     """
 
+    # domain and problem are only used to validate the relation and are not stored, so that relations stay small
+    __slots__ = ('predicate', 'entities', 'value')
+
     def __init__(self, predicate, entities, value, domain = None, problem = None):
         if type(value) is not RelationValue:
             raise Exception('Value must be enum RelationValue')
@@ -29,8 +32,8 @@ class Relation:
                 raise Exception('Problem must be class Problem')
             if not self.is_valid_relation(predicate, entities, domain, problem):
                 raise Exception('Relation is not valid')
-            self.domain = domain
-            self.problem = problem
+            predicate = problem.intern_predicate(predicate)
+            entities = [problem.intern_entity(item) for item in entities]
         self.predicate = predicate
         self.entities = entities
         self.value = value
@@ -76,12 +79,33 @@ class Relation:
         if entity_type is None:
             raise Exception('find_entity_with_type: Type must be specified')
         for item in entities:
-            extension = item.type.get_list_extensions()
-            if entity_type in extension:
+            if item.type.is_subtype(entity_type):
                 return item
         return None
 
+    @property
+    def key(self):
+        """
+        Hashable key that identifies the relation regardless of its value.
+
+        Returns:
+        --------
+        key: tuple
+            (predicate name, tuple of entity names)
+        """
+        return (self.predicate.name, tuple(item.name for item in self.entities))
+
     def modify_value(self, value: RelationValue):
+        """A method that is used to change the value of the relation
+
+        For a relation of a WorldState use WorldState.modify_value instead, which also updates the indexes of the
+        world state, its matcher and its subscribers.
+
+        Parameters
+        ----------
+        value : RelationValue
+            new value of the relation
+        """
         if self.value != value: 
             self.value = value
     
@@ -94,6 +118,8 @@ class Relation:
         return string
     
     def __eq__(self, other):
+        if self is other:
+            return True
         return (
             self.__class__ == other.__class__ and 
             self.value == other.value and 
@@ -101,6 +127,10 @@ class Relation:
             all(map(lambda x, y: x == y, self.entities, other.entities))
         )
 
+    def __hash__(self):
+        # The value is left out because it changes during the life of the relation
+        return hash(self.key)
+
     def equals_exclude_value(self, other):
         return (
             self.__class__ == other.__class__ and 
@@ -4,4 +4,13 @@ class RelationValue(enum.Enum):
     TRUE = 1,
     FALSE = 2,
     PENDING_TRUE = 3,
-    PENDING_FALSE = 4
\ No newline at end of file
+    PENDING_FALSE = 4
+
+# Integer codes of the values, shared by the binary format and the state sync protocol, 0 is never used
+VALUE_CODES = {
+    RelationValue.TRUE: 1,
+    RelationValue.FALSE: 2,
+    RelationValue.PENDING_TRUE: 3,
+    RelationValue.PENDING_FALSE: 4,
+}
+VALUES_BY_CODE = {code: value for value, code in VALUE_CODES.items()}
@@ -0,0 +1,232 @@
+import bisect
+import json
+from collections import deque
+
+from ev_pddl.entity import Entity
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import VALUE_CODES, VALUES_BY_CODE
+from ev_pddl.world_state import WorldState
+from ev_pddl.world_state_event import RelationRemoved, EntityAdded
+
+PROTOCOL_VERSION = 1
+
+# Code of a removed relation on the wire, the values are sent with VALUE_CODES
+_REMOVED = 0
+
+
+def encode_message(message) -> bytes:
+    """A function that is used to encode a message of the sync protocol
+
+    Parameters
+    ----------
+    message : dict
+        message built by StateSyncServer
+    """
+    return json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+
+def decode_message(data) -> dict:
+    """A function that is used to decode a message encoded with encode_message
+
+    Parameters
+    ----------
+    data : bytes or str
+        encoded message
+    """
+    message = json.loads(data)
+    if message.get('protocol') != PROTOCOL_VERSION:
+        raise Exception("Unsupported state sync protocol version %s" % (message.get('protocol')))
+    return message
+
+
+class _IdTable:
+    """
+    A class used to give stable integer ids to names, remembering the state version at which each id was assigned.
+    """
+
+    __slots__ = ('ids', 'definitions', 'versions')
+
+    def __init__(self):
+        self.ids = {}
+        self.definitions = []
+        self.versions = []
+
+    def get_id(self, name, definition, version) -> int:
+        item_id = self.ids.get(name)
+        if item_id is None:
+            item_id = len(self.definitions)
+            self.ids[name] = item_id
+            self.definitions.append(definition)
+            self.versions.append(version)
+        return item_id
+
+    def definitions_since(self, version) -> list:
+        start = bisect.bisect_right(self.versions, version)
+        return [[i] + self.definitions[i] for i in range(start, len(self.definitions))]
+
+
+class StateSyncServer:
+    """
+    A class used to publish the state of a WorldState to remote clients as versioned snapshots and deltas.
+
+    The server subscribes to the world state and gives a new version number to each change it receives. Predicates and
+    entities are sent once with a stable integer id, and facts are then sent as lists of integers
+    [predicate id, entity ids..., value code]. A client at version N asks for changes_since(N) and gets only the facts
+    that differ between version N and the current version, or a snapshot if N is too old. Replacing the relations or
+    the entities of the world state with the setters is not tracked, clients need a new snapshot after that.
+
+    Attributes
+    ----------
+    world_state : WorldState
+        world state that is published
+    version : int
+        current version of the state
+    max_log : int
+        number of versions kept in the changelog
+    """
+
+    def __init__(self, world_state: WorldState, max_log = 1024):
+        if max_log <= 0:
+            raise ValueError("StateSyncServer max_log must be greater than 0")
+        self.world_state = world_state
+        self.max_log = max_log
+        self.version = 0
+        self.__predicates = _IdTable()
+        self.__entities = _IdTable()
+        self.__log = deque()
+        for item in world_state.entities:
+            self._entity_id(item.name, item.type.name)
+        for item in world_state.relations:
+            self._fact(item)
+        self.__subscription = world_state.subscribe(self._on_events)
+
+    def close(self):
+        """A method that is used to stop following the changes of the world state
+        """
+        self.world_state.unsubscribe(self.__subscription)
+
+    def _entity_id(self, name, type_name) -> int:
+        return self.__entities.get_id(name, [name, type_name], self.version)
+
+    def _fact(self, relation) -> tuple:
+        predicate = relation.predicate
+        ids = [self.__predicates.get_id(predicate.name, [predicate.name], self.version)]
+        for item in relation.entities:
+            ids.append(self._entity_id(item.name, item.type.name))
+        return tuple(ids)
+
+    def _on_events(self, events):
+        self.version += 1
+        changes = []
+        for event in events:
+            if type(event) is EntityAdded:
+                self._entity_id(event.entity.name, event.entity.type.name)
+            elif type(event) is RelationRemoved:
+                changes.append((self._fact(event.relation), _REMOVED))
+            else:
+                changes.append((self._fact(event.relation), VALUE_CODES[event.relation.value]))
+        self.__log.append((self.version, changes))
+        if len(self.__log) > self.max_log:
+            self.__log.popleft()
+
+    def snapshot(self) -> dict:
+        """A method that returns a message with the whole current state
+        """
+        return {
+            'protocol': PROTOCOL_VERSION,
+            'type': 'snapshot',
+            'version': self.version,
+            'predicates': self.__predicates.definitions_since(-1),
+            'entities': self.__entities.definitions_since(-1),
+            'facts': [list(self._fact(item)) + [VALUE_CODES[item.value]] for item in self.world_state.relations],
+        }
+
+    def changes_since(self, version) -> dict:
+        """A method that returns a message that brings a client from a version to the current version
+
+        The changes of the versions in between are collapsed, so each fact appears at most once with its final value.
+        A snapshot is returned if the version is not in the changelog anymore.
+
+        Parameters
+        ----------
+        version : int
+            version of the client
+        """
+        if version > self.version or (version < self.version and (not self.__log or version < self.__log[0][0] - 1)):
+            return self.snapshot()
+        facts = {}
+        for entry_version, changes in self.__log:
+            if entry_version <= version:
+                continue
+            for fact, code in changes:
+                facts.pop(fact, None)
+                facts[fact] = code
+        return {
+            'protocol': PROTOCOL_VERSION,
+            'type': 'delta',
+            'from': version,
+            'version': self.version,
+            'predicates': self.__predicates.definitions_since(version),
+            'entities': self.__entities.definitions_since(version),
+            'facts': [list(fact) + [code] for fact, code in facts.items()],
+        }
+
+
+class StateSyncClient:
+    """
+    A class used to rebuild on the client side the state published by a StateSyncServer.
+
+    Attributes
+    ----------
+    domain : Domain
+        domain of the world state
+    version : int
+        version of the state known by the client, -1 before the first snapshot
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.version = -1
+        self.__predicates = {}
+        self.__entities = {}
+        self.__facts = {}
+
+    def apply(self, message):
+        """A method that is used to apply a decoded snapshot or delta message
+
+        Parameters
+        ----------
+        message : dict
+            message from StateSyncServer.snapshot or StateSyncServer.changes_since
+        """
+        if message['type'] == 'snapshot':
+            self.__facts = {}
+        elif message['type'] == 'delta':
+            if message['from'] != self.version:
+                raise Exception("Delta from version %s cannot be applied to version %s" % (message['from'], self.version))
+        else:
+            raise Exception("Unknown state sync message %s" % (message['type']))
+        for predicate_id, name in message['predicates']:
+            self.__predicates[predicate_id] = name
+        for entity_id, name, type_name in message['entities']:
+            self.__entities[entity_id] = (name, type_name)
+        for fact in message['facts']:
+            key = tuple(fact[:-1])
+            if fact[-1] == _REMOVED:
+                self.__facts.pop(key, None)
+            else:
+                self.__facts[key] = VALUES_BY_CODE[fact[-1]]
+        self.version = message['version']
+
+    def to_world_state(self) -> WorldState:
+        """A method that is used to build a WorldState with the state known by the client
+        """
+        world_state = WorldState(self.domain)
+        entities = {}
+        for entity_id, (name, type_name) in self.__entities.items():
+            entities[entity_id] = Entity(name, self.domain.find_type(type_name))
+            world_state.add_entity(entities[entity_id])
+        for key, value in self.__facts.items():
+            predicate = self.domain.find_predicate(self.__predicates[key[0]])
+            world_state.add_relation(Relation(predicate, [entities[item] for item in key[1:]], value))
+        return world_state
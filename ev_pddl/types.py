@@ -1,28 +1,95 @@
 class Type:
 
+    __slots__ = ('name', '__extend', '__extensions', '__extensions_set')
+
     def __init__(self, name, extend):
         self.name = name
-        self.extend = extend
+        self.__extend = extend
+        self.__extensions = None
+        self.__extensions_set = None
+
+    @property
+    def extend(self):
+        """
+        Getter for the type that is extended by this type
+        """
+        return self.__extend
+
+    @extend.setter
+    def extend(self, extend):
+        """
+        Setter for the type that is extended by this type. It cannot be changed once the type is frozen.
+        """
+        if self.__extensions is not None:
+            raise AttributeError('Type %s is frozen, cannot change the type it extends' % (self.name))
+        self.__extend = extend
 
     def __str__(self):
         return 'Type: ' + self.name + \
         ' extends: ' + str(self.extend)
 
     def __eq__(self, other): 
-        if self.name == other:
+        if self is other:
             return True
+        if type(other) is str:
+            return self.name == other
+        if isinstance(other, Type):
+            return self.name == other.name
         return False
 
+    def __hash__(self):
+        # A Type compares equal to its name, so it has to hash like it
+        return hash(self.name)
+
     def __repr__(self):
         return "Type: %s" % (self.name)
+
+    def freeze(self):
+        """
+        Freeze the type hierarchy of this type and of all the types it extends.
+
+        The chain of extensions is computed once and cached, get_list_extensions and is_subtype don't walk the
+        hierarchy anymore after this call.
+        """
+        if self.__extensions is not None:
+            return
+        if self.name != 'object' and self.__extend is not None:
+            self.__extend.freeze()
+        extensions = self._build_list_extensions()
+        self.__extensions = extensions
+        self.__extensions_set = frozenset(extensions)
+
+    def is_frozen(self):
+        """
+        Returns True if the type hierarchy of this type is frozen
+        """
+        return self.__extensions is not None
     
     def get_list_extensions(self):
-        extensions = []
-        extensions.append(self.name)
+        """
+        Returns a tuple with the name of this type followed by the names of all the types it extends, up to object.
+        """
+        if self.__extensions is not None:
+            return self.__extensions
+        return self._build_list_extensions()
+
+    def _build_list_extensions(self):
+        extensions = [self.name]
         if self.name != 'object':
-            list_ext = self.extend.get_list_extensions()
-            for item in list_ext:
-                extensions.append(item)
-        return extensions
+            extensions.extend(self.extend.get_list_extensions())
+        return tuple(extensions)
+
+    def is_subtype(self, other):
+        """
+        Returns True if this type is other or extends it.
 
-    
\ No newline at end of file
+        Parameters
+        ----------
+        other : Type or str
+            type, or name of the type, to check against
+        """
+        if type(other) is not str:
+            other = other.name
+        if self.__extensions_set is not None:
+            return other in self.__extensions_set
+        return other in self._build_list_extensions()
@@ -3,14 +3,196 @@ from ev_pddl.action_definition import ActionDefinition
 from ev_pddl.action_proposition import ActionProposition
 from ev_pddl.action import Action
 from ev_pddl.relation import Relation
+from ev_pddl.relation_value import RelationValue
 from ev_pddl.entity import Entity
+from ev_pddl.action_enumerator import ActionEnumerator
+from ev_pddl.action_template import ActionTemplate
+from ev_pddl.forall_proposition import ForallProposition
+from ev_pddl.world_state_event import RelationAdded, RelationRemoved, ValueChanged, EntityAdded
 import logging
 
 
+class _WorldStateLayer:
+    """
+    A class used to store the relations and entities of a WorldState on top of an optional parent layer.
+
+    A layer only holds what changed with respect to its parent: the relations and entities that were added, the
+    copies of the parent relations whose value was modified, and the keys of the parent relations that were removed,
+    which are mapped to None in relations_index. A relation of a layer is in its relations list only if no parent
+    layer has it. Once a layer is shared by forks it is never written again. When the forks are garbage collected
+    and a single child layer is left, the child takes over the content of the layer, see merge_parent.
+    """
+
+    __slots__ = ('parent', 'children', 'relations', 'relations_index', 'entity_index', 'predicate_index', 'value_index',
+                 'entities', 'entities_index', 'entities_by_type')
+
+    def __init__(self, parent = None):
+        self.parent = parent
+        # Number of layers whose parent is this layer
+        self.children = 0
+        if parent is not None:
+            parent.children += 1
+        self.relations = []
+        self.relations_index = {}
+        self.entity_index = {}
+        self.predicate_index = {}
+        self.value_index = {}
+        self.entities = []
+        self.entities_index = {}
+        self.entities_by_type = {}
+
+    def __del__(self):
+        if self.parent is not None:
+            self.parent.children -= 1
+
+    def is_empty(self) -> bool:
+        return not self.relations_index and not self.entities_index
+
+    def chain(self) -> list:
+        """A method that returns this layer and its parents, from this layer to the root
+        """
+        layers = []
+        layer = self
+        while layer is not None:
+            layers.append(layer)
+            layer = layer.parent
+        return layers
+
+    def find_relation(self, key):
+        layer = self
+        while layer is not None:
+            if key in layer.relations_index:
+                return layer.relations_index[key]
+            layer = layer.parent
+        return None
+
+    def find_entity(self, name):
+        layer = self
+        while layer is not None:
+            item = layer.entities_index.get(name)
+            if item is not None:
+                return item
+            layer = layer.parent
+        return None
+
+    def get_relations(self) -> list:
+        """A method that returns the relations seen from this layer, the relations of the parents come first
+        """
+        if self.parent is None:
+            return self.relations
+        layers = self.chain()[::-1]
+        # Indexes of the layers in which some relations of the parents were modified or removed
+        changed = [i for i, layer in enumerate(layers) if len(layer.relations_index) > len(layer.relations)]
+        relations = []
+        for i, layer in enumerate(layers):
+            upper = [layers[j].relations_index for j in changed if j > i]
+            if not upper:
+                relations.extend(layer.relations)
+                continue
+            for item in layer.relations:
+                key = item.key
+                for index in upper:
+                    if key in index:
+                        item = index[key]
+                        if item is None:
+                            break
+                if item is not None:
+                    relations.append(item)
+        return relations
+
+    def get_entities(self) -> list:
+        if self.parent is None:
+            return self.entities
+        entities = []
+        for layer in reversed(self.chain()):
+            entities.extend(layer.entities)
+        return entities
+
+    def entities_with_type(self, type_name) -> list:
+        entities = []
+        for layer in reversed(self.chain()):
+            entities.extend(layer.entities_by_type.get(type_name, {}).values())
+        return entities
+
+    def index_relation(self, relation):
+        key = relation.key
+        self.relations_index[key] = relation
+        for name in key[1]:
+            self.entity_index.setdefault(name, {})[key] = relation
+        self.index_value(key, relation)
+
+    def unindex_relation(self, key, relation):
+        """A method that removes a relation of this layer from the secondary indexes, it stays in relations_index
+        """
+        for name in key[1]:
+            # An entity can appear more than once in the relation
+            self.entity_index[name].pop(key, None)
+        self.unindex_value(key)
+
+    def index_value(self, key, relation):
+        """A method that adds a relation of this layer to the indexes that depend on its value.
+        The predicate index is split by value, so that the number of relations with a predicate and a value is known.
+        """
+        self.predicate_index.setdefault(key[0], {}).setdefault(relation.value, {})[key] = relation
+        self.value_index.setdefault(relation.value, {})[key] = relation
+
+    def unindex_value(self, key):
+        """A method that removes a relation of this layer from the indexes that depend on its value.
+
+        The value of the relation is not trusted, it may have been changed with Relation.modify_value since it was
+        indexed, so the key is removed from every value bucket.
+        """
+        for bucket in self.predicate_index.get(key[0], {}).values():
+            bucket.pop(key, None)
+        for bucket in self.value_index.values():
+            bucket.pop(key, None)
+
+    def merge_parent(self):
+        """A method that is used to merge the parent layer with this layer, when this layer is its only child.
+        It costs O(changes of this layer).
+
+        The changes of this layer are applied to the indexes of the parent, which then become the indexes of this
+        layer, so the layers on top of this one are not affected.
+        """
+        parent = self.parent
+        for key, item in self.relations_index.items():
+            current = parent.relations_index.get(key)
+            if current is not None:
+                parent.unindex_relation(key, current)
+                if item is None:
+                    if parent.parent is not None and parent.parent.find_relation(key) is not None:
+                        parent.relations_index[key] = None
+                    else:
+                        del parent.relations_index[key]
+                        parent.relations.remove(current)
+                else:
+                    # This layer holds a copy of current, current keeps its place in the relations list
+                    current.value = item.value
+                    parent.index_relation(current)
+            elif item is None:
+                parent.relations_index[key] = None
+            else:
+                if key not in parent.relations_index and (parent.parent is None or parent.parent.find_relation(key) is None):
+                    parent.relations.append(item)
+                parent.index_relation(item)
+        parent.entities.extend(self.entities)
+        parent.entities_index.update(self.entities_index)
+        for type_name, bucket in self.entities_by_type.items():
+            parent.entities_by_type.setdefault(type_name, {}).update(bucket)
+        for name in ('relations', 'relations_index', 'entity_index', 'predicate_index', 'value_index', 'entities',
+                     'entities_index', 'entities_by_type'):
+            setattr(self, name, getattr(parent, name))
+        self.parent = parent.parent
+        # The grandparent keeps the same number of children
+        parent.parent = None
+
+
 class WorldState:
     """
     A class used to define a world state for the current environment.
 
+    A WorldState can be forked to evaluate hypothetical actions, see fork, and its changes can be observed, see subscribe.
+
     Attributes
     ----------
     entities : list
@@ -20,38 +202,164 @@ class WorldState:
     
     """
 
+    # Depth of the chain of layers above which a forked worldstate is flattened when it is forked again
+    _MAX_DEPTH = 8
+
     def __init__(self, domain: Domain):
         self.__domain = domain
-        self.__relations = []
-        self.__entities = []
+        self.__layer = _WorldStateLayer()
+        self.__matcher = None
+        self.__undo_log = []
+        self.__savepoints = []
+        self.__subscriptions = {}
+        self.__next_subscription = 0
+        self.__events = []
 
     @property
     def entities(self):
         """Getter for entities
 
+        For a forked worldstate this is a new list, use add_entity to extend it.
         """
-        return self.__entities
+        return self.__layer.get_entities()
 
     @entities.setter
     def entities(self, entities):
         """Setter for entities
 
         """
-        self.__entities = entities
+        if self.__savepoints:
+            raise Exception("entities cannot be replaced during a transaction")
+        self._flatten()
+        layer = self.__layer
+        layer.entities = entities
+        layer.entities_index = {}
+        layer.entities_by_type = {}
+        for item in entities:
+            if item.name.casefold() not in layer.entities_index:
+                self._index_entity(item)
+        if self.__matcher is not None:
+            self.__matcher.reset()
+
+    def _index_entity(self, entity: Entity):
+        """A method that is used to register an entity in the name index and in the type index
+
+        Parameters
+        ----------
+        entity : type Entity
+            entity that needs to be indexed
+        """
+        layer = self.__layer
+        key = entity.name.casefold()
+        layer.entities_index[key] = entity
+        for type_name in entity.type.get_list_extensions():
+            layer.entities_by_type.setdefault(type_name, {})[key] = entity
+
+    @property
+    def domain(self):
+        """Getter for the domain of the worldstate
+
+        """
+        return self.__domain
 
     @property
     def relations(self):
         """Getter for relations
 
+        The list is kept in sync with an internal index keyed on Relation.key, use add_relation to extend it.
+        For a forked worldstate this is a new list.
         """
-        return self.__relations
+        return self.__layer.get_relations()
 
     @relations.setter
     def relations(self, relations):
         """Setter for relations
 
         """
-        self.__relations = relations
+        if self.__savepoints:
+            raise Exception("relations cannot be replaced during a transaction")
+        self._flatten()
+        layer = self.__layer
+        layer.relations = relations
+        layer.relations_index = {}
+        layer.entity_index = {}
+        layer.predicate_index = {}
+        layer.value_index = {}
+        for item in relations:
+            if item.key not in layer.relations_index:
+                self._index_relation(item)
+        if self.__matcher is not None:
+            self.__matcher.reset()
+
+    def _flatten(self):
+        """A method that is used to detach a forked worldstate from its parents, copying the relations it shares with them
+        """
+        layer = self.__layer
+        if layer.parent is None:
+            return
+        relations = [Relation(item.predicate, list(item.entities), item.value) for item in layer.get_relations()]
+        entities = layer.get_entities()
+        self.__layer = _WorldStateLayer()
+        self.__layer.entities = entities
+        for item in entities:
+            if item.name.casefold() not in self.__layer.entities_index:
+                self._index_entity(item)
+        self.__layer.relations = relations
+        for item in relations:
+            self._index_relation(item)
+
+    def _index_relation(self, relation: Relation):
+        """A method that is used to register a relation in the relation index and in the secondary indexes
+
+        Parameters
+        ----------
+        relation : type Relation
+            relation that needs to be indexed
+        """
+        self.__layer.index_relation(relation)
+
+    def fork(self):
+        """A method that is used to create a copy-on-write child of the current worldstate
+
+        The child shares the relations and entities of this worldstate and only stores what changes afterwards: a
+        relation is copied the first time its value is modified. Both worldstates can be modified independently, so
+        the child can be used to apply hypothetical actions and then be thrown away. Forking costs O(1) and each
+        worldstate then uses memory in O(changes). The child has no matcher attached.
+
+        The layers that are not shared anymore, because the forks were garbage collected, are merged when forking, so
+        forking in a loop and throwing the forks away doesn't make the lookups slower. If the forks are kept, this
+        worldstate is flattened, in O(state), once its chain of layers gets deeper than _MAX_DEPTH.
+
+        Returns
+        -------
+        WorldState
+            the child worldstate
+        """
+        self._merge_layers()
+        layer = self.__layer
+        if layer.parent is not None and layer.is_empty():
+            # Nothing changed since the last fork, the current layer can stay private
+            base = layer.parent
+        else:
+            base = layer
+            self.__layer = _WorldStateLayer(base)
+        child = WorldState(self.__domain)
+        child.__layer = _WorldStateLayer(base)
+        return child
+
+    def _merge_layers(self):
+        """A method that is used to merge the layers of the worldstate that are not shared with forks anymore
+        """
+        depth = 0
+        layer = self.__layer
+        while layer.parent is not None:
+            if layer.parent.children == 1:
+                layer.merge_parent()
+            else:
+                layer = layer.parent
+                depth += 1
+        if depth > self._MAX_DEPTH:
+            self._flatten()
 
     def add_relation(self, relation: Relation):
         """A method that is used to add a relation to the current worldstate
@@ -63,11 +371,28 @@ class WorldState:
         """
         if type(relation) != Relation:
             raise TypeError("add_relation type must be Relation")
-        if self.find_relation(relation) == None:
-            self.__relations.append(relation)
-        else:
-            logging.info(
-                "wolrdstate.add_relation(%s) -> The relation already exists. Skipping." % relation.predicate.name)
+        if self._add_relation(relation):
+            if self.__matcher is not None:
+                self.__matcher.update([relation])
+            self._flush_events()
+
+    def _add_relation(self, relation: Relation) -> bool:
+        """A method that is used to add a relation without notifying the matcher. Returns True if it was added.
+        """
+        if self.find_relation(relation, exclude_value=True) == None:
+            key = relation.key
+            if key not in self.__layer.relations_index:
+                self.__layer.relations.append(relation)
+            # otherwise it replaces a relation of the parent layers that was removed
+            self._index_relation(relation)
+            if self.__savepoints:
+                self.__undo_log.append((key, None))
+            if self.__subscriptions:
+                self.__events.append(RelationAdded(relation))
+            return True
+        logging.info(
+            "wolrdstate.add_relation(%s) -> The relation already exists. Skipping." % relation.predicate.name)
+        return False
 
     def find_relation(self, relation: Relation, exclude_value=False) -> Relation:
         """A method that is used to find a relation in the current WorldState
@@ -86,15 +411,150 @@ class WorldState:
         Relation or None
             relation that was found or None
         """
-        for item in self.__relations:
-            if exclude_value:
-                if item.equals_exclude_value(relation):
-                    return item
-            else:
-                if item == relation:
-                    return item
+        item = self.__layer.find_relation(relation.key)
+        if item is None:
+            return None
+        if exclude_value:
+            if item.equals_exclude_value(relation):
+                return item
+        else:
+            if item == relation:
+                return item
         return None
 
+    def modify_value(self, relation: Relation, value: RelationValue):
+        """A method that is used to modify the value of a relation of the current worldstate
+
+        Parameters
+        ----------
+        relation : type Relation
+            relation whose value needs to be changed. The value of this relation is not taken into account.
+        value : type RelationValue
+            new value of the relation
+
+        Returns
+        -------
+        Relation
+            relation of the worldstate that was modified
+        """
+        worldstate_relation = self.find_relation(relation, exclude_value=True)
+        if worldstate_relation is None:
+            raise KeyError("modify_value: relation %s not found in the worldstate" % str(relation))
+        if self._modify_value(worldstate_relation, value):
+            # The relation may have been copied if it was shared with a fork
+            worldstate_relation = self.__layer.find_relation(worldstate_relation.key)
+            if self.__matcher is not None:
+                self.__matcher.update([worldstate_relation])
+            self._flush_events()
+        return worldstate_relation
+
+    def _modify_value(self, worldstate_relation: Relation, value: RelationValue) -> bool:
+        """A method that is used to change the value of a relation of the worldstate without notifying the matcher.
+        Returns True if the value changed.
+        """
+        layer = self.__layer
+        key = worldstate_relation.key
+        if worldstate_relation.value == value:
+            if layer.relations_index.get(key) is worldstate_relation and key not in layer.value_index.get(value, {}):
+                # The value was changed with Relation.modify_value, only the index needs to follow
+                layer.unindex_value(key)
+                layer.index_value(key, worldstate_relation)
+            return False
+        old_value = worldstate_relation.value
+        if self.__savepoints:
+            self.__undo_log.append((key, old_value))
+        if layer.relations_index.get(key) is not worldstate_relation:
+            # The relation belongs to a layer shared with forks, it is copied into the current layer
+            worldstate_relation = Relation(worldstate_relation.predicate, list(worldstate_relation.entities), value)
+            self._index_relation(worldstate_relation)
+        else:
+            layer.unindex_value(key)
+            worldstate_relation.modify_value(value)
+            layer.index_value(key, worldstate_relation)
+        if self.__subscriptions:
+            self.__events.append(ValueChanged(worldstate_relation, old_value, value))
+        return True
+
+    def _remove_relation(self, key) -> Relation:
+        """A method that is used to remove the relation with the given key without notifying the matcher.
+        Returns the removed relation or None.
+        """
+        layer = self.__layer
+        relation = layer.find_relation(key)
+        if relation is None:
+            return None
+        if layer.relations_index.get(key) is relation:
+            layer.unindex_relation(key, relation)
+        if layer.parent is not None and layer.parent.find_relation(key) is not None:
+            # The relation is still in a parent layer shared with forks, it is hidden in the current layer
+            layer.relations_index[key] = None
+        else:
+            del layer.relations_index[key]
+            if layer.relations[-1] is relation:
+                layer.relations.pop()
+            else:
+                layer.relations.remove(relation)
+        if self.__subscriptions:
+            self.__events.append(RelationRemoved(relation))
+        return relation
+
+    def begin(self) -> int:
+        """A method that is used to start a transaction, or a nested savepoint if a transaction is already in progress
+
+        From now on, the previous value of every relation that is modified and every relation that is added are
+        recorded, so that the changes can be undone with rollback. Entities that are added are not recorded.
+
+        Returns
+        -------
+        int
+            number of savepoints in progress, including the new one
+        """
+        self.__savepoints.append(len(self.__undo_log))
+        return len(self.__savepoints)
+
+    def commit(self):
+        """A method that is used to keep the changes made since the last savepoint and release it
+
+        The changes can still be undone by the rollback of an enclosing savepoint.
+        """
+        if not self.__savepoints:
+            raise Exception("commit: no transaction in progress")
+        self.__savepoints.pop()
+        if not self.__savepoints:
+            self.__undo_log = []
+
+    def rollback(self) -> list:
+        """A method that is used to undo the changes made since the last savepoint and release it. It costs O(changes).
+
+        Returns
+        -------
+        changed_relations : list
+            list of relations that were restored or removed
+        """
+        if not self.__savepoints:
+            raise Exception("rollback: no transaction in progress")
+        savepoint = self.__savepoints.pop()
+        entries = self.__undo_log[savepoint:]
+        changed_relations = []
+        for key, value in reversed(entries):
+            if value is None:
+                relation = self._remove_relation(key)
+            else:
+                self._modify_value(self.__layer.find_relation(key), value)
+                relation = self.__layer.find_relation(key)
+            changed_relations.append(relation)
+        # The undo itself is not recorded
+        del self.__undo_log[savepoint:]
+        if self.__matcher is not None:
+            self.__matcher.update(changed_relations)
+        self._flush_events()
+        return changed_relations
+
+    def in_transaction(self) -> bool:
+        """A method that returns True if a transaction is in progress
+        """
+        return len(self.__savepoints) > 0
+
     def add_entity(self, entity):
         """A method that is used to add an entity to the list of entities
 
@@ -106,7 +566,14 @@ class WorldState:
         if type(entity) != Entity:
             raise TypeError("add_entity type must be Entity")
         if self.find_entity(entity = entity) == None:
-            self.__entities.append(entity)
+            self.__layer.entities.append(entity)
+            if self.__layer.find_entity(entity.name.casefold()) is None:
+                self._index_entity(entity)
+            if self.__matcher is not None:
+                self.__matcher.entity_added(entity)
+            if self.__subscriptions:
+                self.__events.append(EntityAdded(entity))
+                self._flush_events()
         else:
             logging.info(
                 "wolrdstate.add_entity(%s) -> The entity already exists. Skipping." % entity.name)
@@ -126,19 +593,111 @@ class WorldState:
             type of the entity that needs to be found. It needs to be set with a name.
         """
         if entity != None:
-            for item in self.__entities:
-                if item == entity:
-                    return item
+            item = self.__layer.find_entity(entity.name.casefold())
+            if item is not None and item == entity:
+                return item
         elif name != None:
-            for item in self.__entities:
-                if item.name.lower() == name.lower():
-                    if type != None:
-                        if type in item.type.get_list_extensions():
-                            return item
-                    else:
+            item = self.__layer.find_entity(name.casefold())
+            if item is not None:
+                if type != None:
+                    if item.type.is_subtype(type):
                         return item
+                else:
+                    return item
         return None
 
+    def find_entities_with_type(self, type_e) -> list:
+        """A method that is used to find the entities whose type is type_e or extends it
+
+        Parameters
+        ----------
+        type_e : Type or str
+            type, or name of the type, of the entities
+        """
+        if not isinstance(type_e, str):
+            type_e = type_e.name
+        return self.__layer.entities_with_type(type_e)
+
+    def get_applicable_actions(self, action_definitions = None, action_cache = None):
+        """A method that is used to enumerate the actions that can be applied to the current worldstate
+
+        It is a generator, so the caller can stop as soon as it found what it needs. See ActionEnumerator.
+
+        Parameters
+        ----------
+        action_definitions : list, optional
+            definitions of the actions to enumerate, by default all the actions of the domain
+        action_cache : ActionCache, optional
+            cache used to build the actions
+        """
+        return ActionEnumerator(self.__domain, action_cache).applicable_actions(self, action_definitions)
+
+    def attach_matcher(self, matcher):
+        """A method that is used to attach an IncrementalMatcher, which is then updated with every change of the worldstate
+
+        Parameters
+        ----------
+        matcher : IncrementalMatcher or None
+            matcher to attach, None detaches the current one
+        """
+        self.__matcher = matcher
+
+    def subscribe(self, callback, predicates = None, entities = None) -> int:
+        """A method that is used to be notified of the changes of the worldstate
+
+        The callback is called with the list of the events (see world_state_event) of each change: one call for
+        add_relation, modify_value, add_entity and rollback, and one call for all the effects of an applied action.
+        Replacing the relations or the entities with the setters doesn't emit events.
+
+        Parameters
+        ----------
+        callback : callable
+            function called with a list of WorldStateEvent
+        predicates : list, optional
+            predicates, or names of predicates, of the relation events to receive. It doesn't filter the entity events.
+        entities : list, optional
+            entities, or names of entities, that must be part of the events to receive
+
+        Returns
+        -------
+        int
+            id of the subscription, to be used with unsubscribe
+        """
+        if predicates is not None:
+            predicates = set(item if isinstance(item, str) else item.name for item in predicates)
+        if entities is not None:
+            entities = set(item if isinstance(item, str) else item.name for item in entities)
+        subscription = self.__next_subscription
+        self.__next_subscription += 1
+        self.__subscriptions[subscription] = (callback, predicates, entities)
+        return subscription
+
+    def unsubscribe(self, subscription: int):
+        """A method that is used to remove a subscription made with subscribe
+
+        Parameters
+        ----------
+        subscription : int
+            id of the subscription
+        """
+        if self.__subscriptions.pop(subscription, None) is None:
+            raise KeyError("unsubscribe: subscription %s not found" % (subscription))
+
+    def _flush_events(self):
+        """A method that is used to send the pending events to the subscribers
+        """
+        if not self.__events:
+            return
+        events = self.__events
+        self.__events = []
+        for callback, predicates, entities in list(self.__subscriptions.values()):
+            if predicates is None and entities is None:
+                callback(list(events))
+            else:
+                selected = [item for item in events if item.matches(predicates, entities)]
+                if selected:
+                    callback(selected)
+
     def get_dict_predicates(self) -> dict:
         """A method that is used to return a dict with all the predicates listed inside the domain
 
@@ -146,10 +705,7 @@ class WorldState:
         ----------
             none
         """
-        return_dict = {}
-        for item in self.__domain.predicates:
-            return_dict[item.name] = item
-        return return_dict
+        return dict(self.__domain.get_dict_predicates())
 
     def find_entity_ignore_case(self, entity: Entity) -> Entity:
         """A method that is used to find a Entity in the current WorldState without checking for the case in the name
@@ -162,10 +718,7 @@ class WorldState:
             Entity that needs to be found
         """
 
-        for item in self.__entities:
-            if item.name.lower() == entity.lower():
-                return item
-        return None
+        return self.__layer.find_entity(entity.casefold())
 
     def can_action_be_applied(self, action: Action) -> bool:
         """A method that is used to check if an action can be applied to the current worldstate
@@ -194,7 +747,7 @@ class WorldState:
                 if type(item) == Relation:
                     if self.find_relation(item) is None:
                         return False
-                elif type(item) == ActionProposition:
+                elif isinstance(item, ActionProposition):
                     if self._check_precondition_recursive(item) == False:
                         return False
             return True
@@ -203,13 +756,40 @@ class WorldState:
                 if type(item) == Relation:
                     if self.find_relation(item) is not None:
                         return True
-                elif type(item) == ActionProposition:
+                elif isinstance(item, ActionProposition):
                     if self._check_precondition_recursive(item) == True:
                         return True
             return False
         elif action_proposition.name == 'forall':
-            # TODO: forall precondition check
-            pass
+            return self._check_forall(action_proposition)
+
+    def _check_forall(self, forall_proposition: ForallProposition) -> bool:
+        """A method that is used to check a forall precondition. It stops at the first entity for which the body is false.
+
+        The variable takes the values of the entities of its type, from the type index. When the body is a conjunction
+        of literals, the relations are looked up by key without grounding the body.
+
+        Parameters
+        ----------
+        forall_proposition : type ForallProposition
+            grounded forall precondition
+        """
+        entities = self.find_entities_with_type(forall_proposition.argument.type)
+        body = forall_proposition.body
+        if all(item[0] == ActionTemplate.LITERAL for item in body[2]):
+            layer = self.__layer
+            bound = forall_proposition.entities
+            for entity in entities:
+                full = bound + (entity,)
+                for _, predicate, slots, value in body[2]:
+                    item = layer.find_relation((predicate.name, tuple([full[i].name for i in slots])))
+                    if item is None or item.value != value:
+                        return False
+            return True
+        for entity in entities:
+            if not self._check_precondition_recursive(forall_proposition.ground_body(entity)):
+                return False
+        return True
 
     def apply_action(self, action: Action, check_action_can_apply = True):
         """A method that is used to apply an action to the current worldstate. It returns the new worldstate.
@@ -232,6 +812,52 @@ class WorldState:
             changed_relations = self._apply_action_effect(action.effects)
         return changed_relations
 
+    def apply_actions(self, actions, mode = 'fail_fast') -> dict:
+        """A method that is used to apply a sequence of actions to the current worldstate in one pass.
+
+        The changes of all the actions are collapsed in a single diff: a relation changed by several actions appears
+        once with its final value, and a relation whose final value is the value it had before the batch is left out.
+
+        Parameters
+        ----------
+        actions : iterable of Action
+            actions to apply, in order
+        mode : str, optional, default 'fail_fast'
+            'fail_fast': if an action cannot be applied, the changes of the whole batch are rolled back and an
+            exception is raised. 'skip_invalid': the actions that cannot be applied are skipped.
+
+        Returns
+        -------
+        diff : dict
+            dict relation -> final value, where relation is the relation of the worldstate
+        """
+        if mode not in ('fail_fast', 'skip_invalid'):
+            raise ValueError("apply_actions: unknown mode %s" % (mode))
+        initial_values = {}
+        self.begin()
+        try:
+            for action in actions:
+                if not self.can_action_be_applied(action):
+                    if mode == 'fail_fast':
+                        raise Exception("apply_actions: action %s(%s) cannot be applied" % (action.name, ", ".join(item.name for item in action.parameters.values())))
+                    continue
+                for relation in action.effects.parameters:
+                    key = relation.key
+                    if key not in initial_values:
+                        current = self.__layer.find_relation(key)
+                        initial_values[key] = current.value if current is not None else None
+                self._apply_action_effect(action.effects)
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+        diff = {}
+        for key, value in initial_values.items():
+            relation = self.__layer.find_relation(key)
+            if relation.value != value:
+                diff[relation] = relation.value
+        return diff
+
     def _apply_action_effect(self, action_definition: ActionDefinition):
         """A method that is used to apply the effect of an action to the current worldstate.
 
@@ -250,10 +876,14 @@ class WorldState:
             worldstate_relation = self.find_relation(relation, exclude_value=True)
 
             if worldstate_relation is None:
-                self.add_relation(relation)
+                # The relation of the action is copied, so that the action can be applied again or shared
+                self._add_relation(Relation(relation.predicate, list(relation.entities), relation.value))
             else:
-                worldstate_relation.modify_value(relation.value)
+                self._modify_value(worldstate_relation, relation.value)
             changed_relations.append(relation)
+        if self.__matcher is not None:
+            self.__matcher.update(changed_relations)
+        self._flush_events()
         return changed_relations
 
     def get_entity_relations(self, entity: Entity, predicates=None, value_list = None) -> list:
@@ -271,25 +901,99 @@ class WorldState:
         if predicates is not None:
             if type(predicates) != list:
                 raise TypeError("get_entity_relations: predicates type must be list")
-        return_list = []
-        for item in self.__relations:
-            # Excluding values that are not listed in value list
-            if value_list is not None:
-                if item.value not in value_list:
-                    continue
-            if entity in item.entities:
-                if predicates is None:
-                    return_list.append(item)
+        return self._select_relations(entity, predicates, value_list)
+
+    def get_relations(self, predicates=None, value_list=None) -> list:
+        """A method that is used to get the relations of the worldstate filtered by predicates and values.
+
+        Parameters
+        ----------
+        predicates : list, optional
+            list of predicates that we want to get the relations of
+        value_list : list, optional
+            list of values that we want to get the relations of
+        """
+        if predicates is not None:
+            if type(predicates) != list:
+                raise TypeError("get_relations: predicates type must be list")
+        if predicates is None and value_list is None:
+            return list(self.relations)
+        return self._select_relations(None, predicates, value_list)
+
+    def count_relations(self, predicate, value) -> int:
+        """A method that returns the number of relations with a predicate and a value, without building them. It costs
+        O(1) for a worldstate that is not forked.
+
+        For a forked worldstate, the relations that were modified or removed since the fork may be counted twice,
+        so the result is an upper bound.
+
+        Parameters
+        ----------
+        predicate : Predicate
+            predicate of the relations
+        value : RelationValue
+            value of the relations
+        """
+        return sum(len(layer.predicate_index.get(predicate.name, {}).get(value, {})) for layer in self.__layer.chain())
+
+    def _select_relations(self, entity, predicates, value_list) -> list:
+        """A method that is used to answer filtered relation queries with the secondary indexes.
+
+        In each layer, the smallest index among entity, predicates and values is walked and the remaining filters are
+        checked on it, so the cost is bounded by the size of the most selective filter. The relations that were
+        modified or removed in the layers above are skipped.
+
+        Parameters
+        ----------
+        entity : type Entity or None
+            entity that needs to be part of the relations
+        predicates : list or None
+            list of predicates of the relations
+        value_list : list or None
+            list of values of the relations
+        """
+        predicate_names = None
+        if predicates is not None:
+            predicate_names = dict.fromkeys(item.name for item in predicates)
+        values = None
+        if value_list is not None:
+            values = dict.fromkeys(value_list)
+        layers = self.__layer.chain()
+        selected = []
+        for i, layer in enumerate(layers):
+            candidates = []
+            if entity is not None:
+                candidates.append([layer.entity_index.get(entity.name, {})])
+            if predicate_names is not None:
+                if values is not None:
+                    candidates.append([layer.predicate_index.get(name, {}).get(value, {}) for name in predicate_names for value in values])
                 else:
-                    if item.predicate in predicates:
-                        return_list.append(item)
-        return return_list
+                    candidates.append([bucket for name in predicate_names for bucket in layer.predicate_index.get(name, {}).values()])
+            if values is not None:
+                candidates.append([layer.value_index.get(value, {}) for value in values])
+            buckets = min(candidates, key=lambda x: sum(len(bucket) for bucket in x))
+            upper_layers = layers[:i]
+            return_list = []
+            for bucket in buckets:
+                for key, item in bucket.items():
+                    if entity is not None and entity.name not in key[1]:
+                        continue
+                    if predicate_names is not None and key[0] not in predicate_names:
+                        continue
+                    if values is not None and item.value not in values:
+                        continue
+                    if upper_layers and any(key in upper.relations_index for upper in upper_layers):
+                        continue
+                    return_list.append(item)
+            selected.append(return_list)
+        # The relations of the parents come first
+        return [item for return_list in reversed(selected) for item in return_list]
 
     def __str__(self) -> str:
         string = "entities: \n\t"
-        for item in self.__entities:
+        for item in self.entities:
             string += "%s, " % (str(item))
         string += "\nRelations: \n"
-        for item in self.__relations:
+        for item in self.relations:
             string += "\t%s\n " % (str(item))
         return string
@@ -0,0 +1,108 @@
+class WorldStateEvent:
+    """
+    A class used as base class of the events emitted by a WorldState to its subscribers, see WorldState.subscribe.
+    """
+
+    __slots__ = ()
+
+    def matches(self, predicate_names, entity_names) -> bool:
+        """A method that returns True if the event passes the filters of a subscription
+
+        Parameters
+        ----------
+        predicate_names : set or None
+            names of the predicates of the relations, None for any predicate
+        entity_names : set or None
+            names of the entities, None for any entity
+        """
+        return True
+
+
+class RelationEvent(WorldStateEvent):
+    """
+    A class used as base class of the events about a relation.
+
+    Attributes
+    ----------
+    relation : Relation
+        relation of the worldstate the event is about
+    """
+
+    __slots__ = ('relation',)
+
+    def __init__(self, relation):
+        self.relation = relation
+
+    def matches(self, predicate_names, entity_names) -> bool:
+        key = self.relation.key
+        if predicate_names is not None and key[0] not in predicate_names:
+            return False
+        if entity_names is not None and not any(name in entity_names for name in key[1]):
+            return False
+        return True
+
+    def __str__(self) -> str:
+        return "%s(%s)" % (self.__class__.__name__, str(self.relation))
+
+
+class RelationAdded(RelationEvent):
+    """
+    A class used to represent the addition of a relation to a WorldState.
+    """
+
+    __slots__ = ()
+
+
+class RelationRemoved(RelationEvent):
+    """
+    A class used to represent the removal of a relation from a WorldState, which happens when a transaction is rolled back.
+    """
+
+    __slots__ = ()
+
+
+class ValueChanged(RelationEvent):
+    """
+    A class used to represent the change of the value of a relation of a WorldState.
+
+    Attributes
+    ----------
+    relation : Relation
+        relation of the worldstate, with the new value
+    old_value : RelationValue
+        value of the relation before the change
+    new_value : RelationValue
+        value of the relation after the change
+    """
+
+    __slots__ = ('old_value', 'new_value')
+
+    def __init__(self, relation, old_value, new_value):
+        super().__init__(relation)
+        self.old_value = old_value
+        self.new_value = new_value
+
+    def __str__(self) -> str:
+        return "%s(%s, %s -> %s)" % (self.__class__.__name__, str(self.relation), str(self.old_value), str(self.new_value))
+
+
+class EntityAdded(WorldStateEvent):
+    """
+    A class used to represent the addition of an entity to a WorldState.
+
+    Attributes
+    ----------
+    entity : Entity
+        entity that was added
+    """
+
+    __slots__ = ('entity',)
+
+    def __init__(self, entity):
+        self.entity = entity
+
+    def matches(self, predicate_names, entity_names) -> bool:
+        return entity_names is None or self.entity.name in entity_names
+
+    def __str__(self) -> str:
+        return "%s(%s)" % (self.__class__.__name__, str(self.entity))
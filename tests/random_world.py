@@ -0,0 +1,147 @@
+"""
+Random world states of the Camelot domain, and a plain dict model of a world state, used by the differential tests.
+"""
+
+import itertools
+import os
+
+from ev_pddl.PDDL import PDDL_Parser
+from ev_pddl.action import Action
+from ev_pddl.entity import Entity
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import RelationValue
+from ev_pddl.world_state import WorldState
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ev_pddl', 'data')
+TYPES = ['character', 'location', 'furniture', 'entrypoint', 'item']
+
+
+def load_camelot():
+    """A function that returns the Camelot domain and the example problem
+    """
+    parser = PDDL_Parser()
+    domain = parser.parse_domain(os.path.join(DATA, 'camelot_domain.pddl'))
+    problem = parser.parse_problem(os.path.join(DATA, 'example_problem.pddl'))
+    return domain, problem
+
+
+def random_relation(rng, domain, entities, values = (RelationValue.TRUE, RelationValue.TRUE, RelationValue.FALSE)):
+    """A function that returns a relation of a random predicate between random entities of the right types,
+    or None if there is no entity of one of the types
+    """
+    predicate = rng.choice(domain.predicates)
+    arguments = []
+    for item in predicate.arguments:
+        candidates = [entity for entity in entities if entity.type.is_subtype(item)]
+        if not candidates:
+            return None
+        arguments.append(rng.choice(candidates))
+    return Relation(predicate, arguments, rng.choice(values))
+
+
+def random_world(rng, domain, problem, extra = 0):
+    """A function that returns a WorldState with the example problem and extra random entities and relations,
+    and the Model of the same state
+    """
+    world_state = WorldState(domain)
+    model = Model()
+    entities = list(problem.objects)
+    for item in problem.objects:
+        world_state.add_entity(item)
+        model.add_entity(item)
+    for item in problem.initial_state:
+        world_state.add_relation(Relation(item.predicate, list(item.entities), item.value))
+        model.set_value(item, item.value)
+    for i in range(extra):
+        type_name = rng.choice(TYPES)
+        entity = Entity('%s%d' % (type_name, i), domain.find_type(type_name))
+        entities.append(entity)
+        world_state.add_entity(entity)
+        model.add_entity(entity)
+    for _ in range(extra * 3):
+        relation = random_relation(rng, domain, entities)
+        if relation is not None and model.get_value(relation) is None:
+            world_state.add_relation(relation)
+            model.set_value(relation, relation.value)
+    return world_state, model
+
+
+def action_keys(actions) -> set:
+    """A function that returns the set of (name, entity names) of actions
+    """
+    return set((item.name, tuple(entity.name for entity in item.parameters.values())) for item in actions)
+
+
+def brute_force_actions(world_state) -> set:
+    """A function that returns the action_keys of the applicable actions, checking every grounding of every action
+    """
+    keys = set()
+    for action_definition in world_state.domain.actions:
+        candidates = [world_state.find_entities_with_type(item.type) for item in action_definition.parameters]
+        for entities in itertools.product(*candidates):
+            action = Action(action_definition, dict(zip([item.name for item in action_definition.parameters], entities)))
+            if world_state.can_action_be_applied(action):
+                keys.add((action.name, tuple(item.name for item in entities)))
+    return keys
+
+
+class Model:
+    """
+    A class used to model the facts and the entities of a world state with plain dicts.
+    """
+
+    def __init__(self, facts = None, entities = None):
+        self.facts = dict(facts) if facts is not None else {}
+        self.entities = dict(entities) if entities is not None else {}
+
+    def copy(self):
+        return Model(self.facts, self.entities)
+
+    def add_entity(self, entity):
+        self.entities.setdefault(entity.name.casefold(), entity)
+
+    def get_value(self, relation):
+        return self.facts.get(relation.key)
+
+    def set_value(self, relation, value):
+        self.facts[relation.key] = value
+
+    def apply_action(self, action):
+        for item in action.effects.parameters:
+            self.set_value(item, item.value)
+
+    def differences(self, world_state) -> list:
+        """A method that returns the queries of world_state whose result doesn't match the model, empty if it matches
+        """
+        differences = []
+        facts = sorted(self.facts.items())
+        if sorted((item.key, item.value) for item in world_state.relations) != facts:
+            differences.append('relations')
+        for value in RelationValue:
+            expected = sorted(key for key, item in facts if item == value)
+            if sorted(item.key for item in world_state.get_relations(value_list=[value])) != expected:
+                differences.append('get_relations value %s' % (value.name))
+        for predicate in world_state.domain.predicates[:6]:
+            expected = sorted(key for key, item in facts if key[0] == predicate.name and item == RelationValue.TRUE)
+            found = world_state.get_relations(predicates=[predicate], value_list=[RelationValue.TRUE])
+            if sorted(item.key for item in found) != expected:
+                differences.append('get_relations predicate %s' % (predicate.name))
+            if world_state.count_relations(predicate, RelationValue.TRUE) < len(expected):
+                differences.append('count_relations %s' % (predicate.name))
+        for entity in list(self.entities.values())[:6]:
+            expected = sorted(key for key, item in facts if entity.name in key[1])
+            if sorted(item.key for item in world_state.get_entity_relations(entity)) != expected:
+                differences.append('get_entity_relations %s' % (entity.name))
+        for key, value in facts:
+            found = world_state.find_relation(Relation(world_state.domain.find_predicate(key[0]),
+                                                       [self.entities[name.casefold()] for name in key[1]], value))
+            if found is None or found.value != value:
+                differences.append('find_relation %s' % (str(key)))
+                break
+        if sorted(item.name for item in world_state.entities) != sorted(item.name for item in self.entities.values()):
+            differences.append('entities')
+        for type_name in TYPES:
+            expected = sorted(item.name for item in self.entities.values() if item.type.is_subtype(type_name))
+            if sorted(item.name for item in world_state.find_entities_with_type(type_name)) != expected:
+                differences.append('find_entities_with_type %s' % (type_name))
+        return differences
@@ -0,0 +1,48 @@
+import unittest
+
+from ev_pddl.PDDL import PDDL_Parser
+from ev_pddl.action_cache import ActionCache
+from ev_pddl.forall_proposition import ForallProposition
+
+FORALL_DOMAIN = '''(define (domain forall) (:requirements :typing :universal-preconditions)
+ (:types thing agent - object
+ )
+ (:predicates (ok ?x - thing) (ready ?a - agent))
+ (:action go :parameters (?a - agent) :precondition (and (ready ?a) (forall (?x - thing) (and (ok ?x)))) :effect (and (not (ready ?a))))
+)'''
+
+FORALL_PROBLEM = '''(define (problem p) (:domain forall) (:objects
+ a1 - agent
+ t1 t2 - thing
+ )
+ (:init (ready a1) (ok t1)))'''
+
+
+class FrozenActionTest(unittest.TestCase):
+
+    def setUp(self):
+        parser = PDDL_Parser()
+        self.domain = parser.parse_domain_string(FORALL_DOMAIN)
+        self.problem = parser.parse_problem_string(FORALL_PROBLEM)
+        self.definition = self.domain.find_action_with_name('go')
+        self.action = ActionCache(self.domain).get_action(self.definition, {'?a': self.problem.find_objects('a1')})
+
+    def test_cached_action_is_frozen(self):
+        self.assertTrue(self.action.is_frozen())
+        with self.assertRaises(AttributeError):
+            self.action.parameters = {'?a': self.problem.find_objects('a1')}
+        with self.assertRaises(AttributeError):
+            self.action.create_action(self.definition, {'?a': self.problem.find_objects('a1')})
+
+    def test_forall_is_frozen(self):
+        forall = [item for item in self.action.preconditions.parameters if isinstance(item, ForallProposition)][0]
+        self.assertTrue(forall.is_frozen())
+        with self.assertRaises(AttributeError):
+            forall.add_parameter(None)
+        body = forall.ground_body(self.problem.find_objects('t1'))
+        with self.assertRaises(AttributeError):
+            body.add_parameter(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
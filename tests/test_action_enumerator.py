@@ -0,0 +1,31 @@
+import itertools
+import unittest
+
+from ev_pddl.PDDL import PDDL_Parser
+from ev_pddl.world_state import WorldState
+
+UNBOUND_DOMAIN = '''(define (domain unbound) (:requirements :typing)
+ (:types thing - object
+ )
+ (:predicates (ok ?x - thing))
+ (:action go :parameters (?a - thing ?b - thing ?c - thing) :precondition (and) :effect (and (ok ?a)))
+)'''
+
+
+class ActionEnumeratorTest(unittest.TestCase):
+
+    def test_unbound_parameters_are_enumerated_lazily(self):
+        parser = PDDL_Parser()
+        domain = parser.parse_domain_string(UNBOUND_DOMAIN)
+        objects = ' '.join('t%d' % i for i in range(1000))
+        problem = parser.parse_problem_string('(define (problem p) (:domain unbound) (:objects\n %s - thing\n ) (:init))' % objects)
+        world_state = WorldState(domain)
+        world_state.entities = list(problem.objects)
+        # The full product has 10^9 groundings, only the first ones can be built
+        actions = list(itertools.islice(world_state.get_applicable_actions(), 5))
+        self.assertEqual(len(actions), 5)
+        self.assertEqual(len(set((item.name, tuple(entity.name for entity in item.parameters.values())) for item in actions)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
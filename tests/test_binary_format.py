@@ -0,0 +1,156 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from ev_pddl import binary_format
+from ev_pddl.PDDL import PDDL_Parser
+from ev_pddl.entity import Entity
+from ev_pddl.relation import Relation
+from ev_pddl.relation_value import RelationValue
+from ev_pddl.world_state import WorldState
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ev_pddl', 'data')
+
+
+def _facts(relations):
+    return [(item.predicate.name, tuple((entity.name, entity.type.name) for entity in item.entities), item.value)
+            for item in relations]
+
+
+def _entities(entities):
+    return [(item.name, item.type.name) for item in entities]
+
+
+class BinaryFormatTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        parser = PDDL_Parser()
+        cls.domain = parser.parse_domain(os.path.join(DATA, 'camelot_domain.pddl'))
+        cls.problem = parser.parse_problem(os.path.join(DATA, 'example_problem.pddl'))
+
+    def _world_state(self):
+        world_state = WorldState(self.domain)
+        for item in self.problem.objects:
+            world_state.add_entity(item)
+        for item in self.problem.initial_state:
+            world_state.add_relation(Relation(item.predicate, list(item.entities), item.value))
+        # Every value must survive the round trip
+        relations = world_state.relations
+        world_state.modify_value(relations[0], RelationValue.FALSE)
+        world_state.modify_value(relations[1], RelationValue.PENDING_TRUE)
+        world_state.modify_value(relations[2], RelationValue.PENDING_FALSE)
+        return world_state
+
+    def _dump_and_load(self, obj, domain = None):
+        return self._load_bytes(binary_format.dumps(obj), domain)
+
+    def _load_bytes(self, data, domain = None):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'state.evpd')
+            with open(filename, 'wb') as file:
+                file.write(data)
+            return binary_format.load(filename, domain)
+
+    def assertDomainEqual(self, loaded, domain):
+        self.assertEqual(loaded.domain_name, domain.domain_name)
+        self.assertEqual([(item.name, item.extend.name if item.extend is not None else None) for item in loaded.types],
+                         [(item.name, item.extend.name if item.extend is not None else None) for item in domain.types])
+        self.assertEqual([(item.name, [argument.name for argument in item.arguments]) for item in loaded.predicates],
+                         [(item.name, [argument.name for argument in item.arguments]) for item in domain.predicates])
+        self.assertEqual([item.name for item in loaded.actions], [item.name for item in domain.actions])
+        self.assertEqual(str(loaded), str(domain))
+
+    def test_domain_round_trip(self):
+        loaded = binary_format.loads(binary_format.dumps(self.domain))
+        self.assertDomainEqual(loaded, self.domain)
+
+    def test_problem_round_trip(self):
+        loaded = binary_format.loads(binary_format.dumps(self.problem), self.domain)
+        self.assertEqual(loaded.problem_name, self.problem.problem_name)
+        self.assertEqual(_entities(loaded.objects), _entities(self.problem.objects))
+        self.assertEqual(_facts(loaded.initial_state), _facts(self.problem.initial_state))
+
+    def test_world_state_round_trip(self):
+        world_state = self._world_state()
+        loaded = binary_format.loads(binary_format.dumps(world_state), self.domain)
+        self.assertEqual(_entities(loaded.entities), _entities(world_state.entities))
+        self.assertEqual(_facts(loaded.relations), _facts(world_state.relations))
+        self.assertEqual(len(loaded.get_relations(value_list=[RelationValue.PENDING_TRUE])), 1)
+
+    def test_domain_dump_load(self):
+        self.assertDomainEqual(self._dump_and_load(self.domain), self.domain)
+
+    def test_problem_dump_load(self):
+        loaded = self._dump_and_load(self.problem, self.domain)
+        self.assertEqual(_entities(loaded.objects), _entities(self.problem.objects))
+        self.assertEqual(_facts(loaded.initial_state), _facts(self.problem.initial_state))
+
+    def test_world_state_dump_load(self):
+        world_state = self._world_state()
+        loaded = self._dump_and_load(world_state, self.domain)
+        self.assertEqual(_entities(loaded.entities), _entities(world_state.entities))
+        self.assertEqual(_facts(loaded.relations), _facts(world_state.relations))
+
+    def test_entities_with_the_same_name(self):
+        world_state = WorldState(self.domain)
+        character = Entity('twin', self.domain.find_type('character'))
+        location = Entity('twin', self.domain.find_type('location'))
+        other = Entity('other', self.domain.find_type('character'))
+        world_state.entities = [character, location, other]
+        world_state.relations = [Relation(self.domain.find_predicate('in'), [other, location], RelationValue.TRUE)]
+        loaded = binary_format.loads(binary_format.dumps(world_state), self.domain)
+        self.assertEqual(_facts(loaded.relations), _facts(world_state.relations))
+
+    def test_missing_entity(self):
+        world_state = WorldState(self.domain)
+        item = self.problem.initial_state[0]
+        world_state.add_relation(Relation(item.predicate, list(item.entities), item.value))
+        with self.assertRaisesRegex(Exception, 'is not in the objects or entities'):
+            binary_format.dumps(world_state)
+
+    def test_bad_magic(self):
+        data = bytearray(binary_format.dumps(self.domain))
+        data[:4] = b'XXXX'
+        with self.assertRaisesRegex(Exception, 'Not an ev_pddl binary file'):
+            binary_format.loads(data)
+        with self.assertRaisesRegex(Exception, 'Not an ev_pddl binary file'):
+            binary_format.loads(b'EV')
+
+    def test_bad_version(self):
+        data = bytearray(binary_format.dumps(self.domain))
+        struct.pack_into('<H', data, 4, binary_format.FORMAT_VERSION + 1)
+        with self.assertRaisesRegex(Exception, 'Unsupported ev_pddl binary format version %s' % (binary_format.FORMAT_VERSION + 1)):
+            binary_format.loads(data)
+
+    def test_wrong_domain(self):
+        data = binary_format.dumps(self.problem)
+        domain = binary_format.loads(binary_format.dumps(self.domain))
+        domain.domain_name = 'other'
+        with self.assertRaisesRegex(Exception, 'was written for domain'):
+            binary_format.loads(data, domain)
+
+    def test_load_wrong_domain(self):
+        domain = binary_format.loads(binary_format.dumps(self.domain))
+        domain.domain_name = 'other'
+        with self.assertRaisesRegex(Exception, 'was written for domain'):
+            self._dump_and_load(self._world_state(), domain)
+
+    def test_load_bad_magic(self):
+        data = bytearray(binary_format.dumps(self.domain))
+        data[:4] = b'XXXX'
+        with self.assertRaisesRegex(Exception, 'Not an ev_pddl binary file'):
+            self._load_bytes(bytes(data))
+
+    def test_load_truncated(self):
+        data = binary_format.dumps(self.problem)
+        for end in (0, 3, 10, 20, len(data) // 2, len(data) - 4, len(data) - 1):
+            with self.assertRaises(Exception) as context:
+                self._load_bytes(data[:end], self.domain)
+            self.assertNotIsInstance(context.exception, BufferError)
+            self.assertRegex(str(context.exception), 'Truncated ev_pddl binary file|Not an ev_pddl binary file')
+
+
+if __name__ == '__main__':
+    unittest.main()
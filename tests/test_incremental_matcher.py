@@ -0,0 +1,68 @@
+import random
+import unittest
+
+from ev_pddl.entity import Entity
+from ev_pddl.incremental_matcher import IncrementalMatcher
+from ev_pddl.relation_value import RelationValue
+from tests.random_world import TYPES, action_keys, brute_force_actions, load_camelot, random_relation, random_world
+
+
+class IncrementalMatcherTest(unittest.TestCase):
+    """
+    The applicable actions of the matcher are compared with a full enumeration after every change of random sequences,
+    and the enumeration itself with a brute force check of every grounding.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.domain, cls.problem = load_camelot()
+
+    def test_enumerator_matches_brute_force(self):
+        for seed in range(3):
+            world_state, _ = random_world(random.Random(seed), self.domain, self.problem, extra=6)
+            self.assertEqual(action_keys(world_state.get_applicable_actions()), brute_force_actions(world_state), seed)
+
+    def test_matcher_matches_enumerator(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            world_state, _ = random_world(rng, self.domain, self.problem, extra=8)
+            matcher = IncrementalMatcher(world_state)
+            for step in range(60):
+                self._random_change(rng, world_state, matcher, step)
+                self.assertEqual(action_keys(matcher.get_applicable_actions()),
+                                 action_keys(world_state.get_applicable_actions()), (seed, step))
+            self.assertEqual(action_keys(matcher.get_applicable_actions()), brute_force_actions(world_state), seed)
+
+    def test_matcher_follows_rollback(self):
+        for seed in range(3):
+            rng = random.Random(seed)
+            world_state, _ = random_world(rng, self.domain, self.problem, extra=8)
+            matcher = IncrementalMatcher(world_state)
+            expected = action_keys(matcher.get_applicable_actions())
+            world_state.begin()
+            for step in range(20):
+                self._random_change(rng, world_state, matcher, step, add_entities=False)
+            world_state.rollback()
+            self.assertEqual(action_keys(matcher.get_applicable_actions()), expected, seed)
+            self.assertEqual(action_keys(world_state.get_applicable_actions()), expected, seed)
+
+    def _random_change(self, rng, world_state, matcher, step, add_entities = True):
+        choice = rng.random()
+        if choice < 0.4:
+            actions = matcher.get_applicable_actions()
+            if actions:
+                world_state.apply_action(rng.choice(actions))
+        elif choice < 0.7:
+            relation = rng.choice(world_state.relations)
+            world_state.modify_value(relation, rng.choice(list(RelationValue)))
+        elif choice < 0.8 and add_entities:
+            type_name = rng.choice(TYPES)
+            world_state.add_entity(Entity('new%s%d' % (type_name, step), self.domain.find_type(type_name)))
+        else:
+            relation = random_relation(rng, self.domain, world_state.entities)
+            if relation is not None:
+                world_state.add_relation(relation)
+
+
+if __name__ == '__main__':
+    unittest.main()
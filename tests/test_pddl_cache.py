@@ -0,0 +1,68 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from ev_pddl import pddl_cache
+from ev_pddl.PDDL import PDDL_Parser
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ev_pddl', 'data')
+DOMAIN = os.path.join(DATA, 'camelot_domain.pddl')
+PROBLEM = os.path.join(DATA, 'example_problem.pddl')
+
+
+class PDDLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = pddl_cache.PDDLCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _entries(self, kind):
+        return [name[len(kind) + 1:-len('.pickle')] for name in os.listdir(self.directory.name) if name.startswith(kind + '-')]
+
+    def test_key_depends_on_the_code(self):
+        key = self.cache.key(b'(define (domain d))')
+        self.assertEqual(key, self.cache.key(b'(define (domain d))'))
+        try:
+            original = pddl_cache.code_fingerprint
+            pddl_cache.code_fingerprint = lambda: 'other code'
+            self.assertNotEqual(key, self.cache.key(b'(define (domain d))'))
+        finally:
+            pddl_cache.code_fingerprint = original
+
+    def test_round_trip(self):
+        parser = PDDL_Parser(cache_dir=self.directory.name)
+        domain = parser.parse_domain(DOMAIN)
+        problem = parser.parse_problem(PROBLEM)
+        self.assertEqual(len(self._entries('domain')), 1)
+        self.assertEqual(len(self._entries('problem')), 1)
+        parser = PDDL_Parser(cache_dir=self.directory.name)
+        self.assertEqual(str(parser.parse_domain(DOMAIN)), str(domain))
+        self.assertEqual([str(item) for item in parser.parse_problem(PROBLEM).initial_state],
+                         [str(item) for item in problem.initial_state])
+
+    def test_entry_with_an_old_layout_is_a_miss(self):
+        PDDL_Parser(cache_dir=self.directory.name).parse_domain(DOMAIN)
+        key = self._entries('domain')[0]
+        domain = self.cache.load_domain(key)
+        self.assertIsNotNone(domain)
+        # An entry written before Domain had a version
+        del domain.__dict__['_Domain__version']
+        with open(os.path.join(self.directory.name, 'domain-%s.pickle' % (key)), 'wb') as f:
+            f.write(pickle.dumps(domain))
+        self.assertIsNone(self.cache.load_domain(key))
+        # The parser rebuilds it
+        self.assertEqual(PDDL_Parser(cache_dir=self.directory.name).parse_domain(DOMAIN).version,
+                         PDDL_Parser().parse_domain(DOMAIN).version)
+
+    def test_broken_entry_is_a_miss(self):
+        with open(os.path.join(self.directory.name, 'domain-broken.pickle'), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertIsNone(self.cache.load_domain('broken'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import gc
+import random
+import unittest
+
+from ev_pddl.entity import Entity
+from ev_pddl.relation_value import RelationValue
+from ev_pddl.world_state import WorldState
+from tests.random_world import TYPES, load_camelot, random_relation, random_world
+
+
+class WorldStateForkTest(unittest.TestCase):
+    """
+    Random sequences of forks, changes and discarded forks are applied both to world states and to plain dict models,
+    and every live world state must answer the queries like its model.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.domain, cls.problem = load_camelot()
+
+    def assertMatches(self, model, world_state, message):
+        self.assertEqual(model.differences(world_state), [], message)
+
+    def _random_change(self, rng, world_state, model, step):
+        choice = rng.random()
+        if choice < 0.15:
+            type_name = rng.choice(TYPES)
+            entity = Entity('new%s%d' % (type_name, step), self.domain.find_type(type_name))
+            world_state.add_entity(entity)
+            model.add_entity(entity)
+        elif choice < 0.35:
+            relation = random_relation(rng, self.domain, list(model.entities.values()))
+            if relation is not None and model.get_value(relation) is None:
+                world_state.add_relation(relation)
+                model.set_value(relation, relation.value)
+        elif choice < 0.7:
+            relation = rng.choice(world_state.relations)
+            value = rng.choice(list(RelationValue))
+            world_state.modify_value(relation, value)
+            model.set_value(relation, value)
+        else:
+            actions = list(world_state.get_applicable_actions())
+            if actions:
+                action = rng.choice(actions)
+                world_state.apply_action(action)
+                model.apply_action(action)
+
+    def test_random_forks(self):
+        for seed in range(6):
+            rng = random.Random(seed)
+            world_state, model = random_world(rng, self.domain, self.problem, extra=6)
+            states = [(world_state, model)]
+            for step in range(200):
+                i = rng.randrange(len(states))
+                world_state, model = states[i]
+                choice = rng.random()
+                if choice < 0.15 and len(states) < 6:
+                    states.append((world_state.fork(), model.copy()))
+                elif choice < 0.25 and len(states) > 1:
+                    # The layers that are not shared anymore are merged on the next fork
+                    del states[i]
+                    del world_state
+                    gc.collect()
+                    continue
+                elif choice < 0.35:
+                    # A rolled back transaction removes relations that may still be in shared layers
+                    snapshot = model.copy()
+                    world_state.begin()
+                    for _ in range(3):
+                        self._random_change(rng, world_state, model, step)
+                    world_state.rollback()
+                    model.facts = snapshot.facts
+                else:
+                    self._random_change(rng, world_state, model, step)
+                for j, (world_state, model) in enumerate(states):
+                    self.assertMatches(model, world_state, (seed, step, j))
+
+    def test_fork_loop_keeps_the_chain_short(self):
+        world_state, model = random_world(random.Random(0), self.domain, self.problem, extra=6)
+        relations = world_state.relations
+        for step in range(500):
+            child = world_state.fork()
+            child.modify_value(relations[step % len(relations)], RelationValue.FALSE)
+            relation = world_state.relations[step % 7]
+            value = RelationValue.TRUE if step % 2 else RelationValue.FALSE
+            world_state.modify_value(relation, value)
+            model.set_value(relation, value)
+        self.assertLessEqual(len(world_state._WorldState__layer.chain()), 3)
+        self.assertMatches(model, world_state, 'parent')
+
+    def test_kept_forks(self):
+        world_state, model = random_world(random.Random(1), self.domain, self.problem, extra=6)
+        forks = []
+        for step in range(3 * WorldState._MAX_DEPTH + 5):
+            forks.append((world_state.fork(), model.copy()))
+            relation = world_state.relations[step % 11]
+            value = RelationValue.PENDING_TRUE if step % 2 else RelationValue.PENDING_FALSE
+            world_state.modify_value(relation, value)
+            model.set_value(relation, value)
+        self.assertLessEqual(len(world_state._WorldState__layer.chain()), WorldState._MAX_DEPTH + 2)
+        self.assertMatches(model, world_state, 'parent')
+        for i, (fork, fork_model) in enumerate(forks):
+            self.assertMatches(fork_model, fork, i)
+
+    def test_long_chain_of_forks(self):
+        # Each fork is forked again and the previous one is thrown away
+        world_state, model = random_world(random.Random(2), self.domain, self.problem, extra=6)
+        for step in range(2000):
+            world_state = world_state.fork()
+            relation = world_state.relations[step % 13]
+            value = RelationValue.TRUE if step % 3 else RelationValue.FALSE
+            world_state.modify_value(relation, value)
+            model.set_value(relation, value)
+        self.assertMatches(model, world_state, 'last fork')
+        str(world_state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import random
+import unittest
+
+from ev_pddl.entity import Entity
+from ev_pddl.relation_value import RelationValue
+from tests.random_world import TYPES, load_camelot, random_relation, random_world
+
+
+class WorldStateTransactionTest(unittest.TestCase):
+    """
+    Random sequences of nested savepoints are applied both to world states and to plain dict models, the model
+    keeps a snapshot for each savepoint in progress.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.domain, cls.problem = load_camelot()
+
+    def assertMatches(self, model, world_state, message):
+        self.assertEqual(model.differences(world_state), [], message)
+
+    def _random_change(self, rng, world_state, model, step):
+        choice = rng.random()
+        if choice < 0.3:
+            relation = random_relation(rng, self.domain, list(model.entities.values()))
+            if relation is not None and model.get_value(relation) is None:
+                world_state.add_relation(relation)
+                model.set_value(relation, relation.value)
+        elif choice < 0.7:
+            relation = rng.choice(world_state.relations)
+            value = rng.choice(list(RelationValue))
+            world_state.modify_value(relation, value)
+            model.set_value(relation, value)
+        else:
+            actions = list(world_state.get_applicable_actions())
+            if actions:
+                action = rng.choice(actions)
+                world_state.apply_action(action)
+                model.apply_action(action)
+
+    def test_random_savepoints(self):
+        for seed in range(6):
+            rng = random.Random(seed)
+            world_state, model = random_world(rng, self.domain, self.problem, extra=6)
+            snapshots = []
+            for step in range(300):
+                choice = rng.random()
+                if choice < 0.15:
+                    snapshots.append(model.copy())
+                    self.assertEqual(world_state.begin(), len(snapshots))
+                elif choice < 0.25 and snapshots:
+                    # The changes are kept, the enclosing savepoint can still undo them
+                    snapshots.pop()
+                    world_state.commit()
+                elif choice < 0.35 and snapshots:
+                    world_state.rollback()
+                    model.facts = snapshots.pop().facts
+                else:
+                    self._random_change(rng, world_state, model, step)
+                self.assertEqual(world_state.in_transaction(), len(snapshots) > 0)
+                self.assertMatches(model, world_state, (seed, step))
+            while snapshots:
+                world_state.rollback()
+                model.facts = snapshots.pop().facts
+            self.assertMatches(model, world_state, seed)
+
+    def test_nested_rollback(self):
+        rng = random.Random(10)
+        world_state, model = random_world(rng, self.domain, self.problem, extra=6)
+        start = model.copy()
+        relations = world_state.relations
+        world_state.begin()
+        world_state.modify_value(relations[0], RelationValue.PENDING_TRUE)
+        model.set_value(relations[0], RelationValue.PENDING_TRUE)
+        outer = model.copy()
+
+        # An inner rollback keeps the changes of the outer savepoint
+        self.assertEqual(world_state.begin(), 2)
+        world_state.modify_value(relations[0], RelationValue.FALSE)
+        world_state.modify_value(relations[1], RelationValue.PENDING_FALSE)
+        world_state.rollback()
+        self.assertMatches(outer, world_state, 'inner rollback')
+
+        # An outer rollback undoes the committed inner changes
+        world_state.begin()
+        world_state.modify_value(relations[2], RelationValue.PENDING_FALSE)
+        for _ in range(10):
+            self._random_change(rng, world_state, model, 0)
+        world_state.commit()
+        self.assertTrue(world_state.in_transaction())
+        world_state.rollback()
+        self.assertFalse(world_state.in_transaction())
+        self.assertMatches(start, world_state, 'outer rollback')
+
+    def test_entities_are_kept(self):
+        world_state, model = random_world(random.Random(11), self.domain, self.problem, extra=6)
+        world_state.begin()
+        entity = Entity('newitem', self.domain.find_type(TYPES[-1]))
+        world_state.add_entity(entity)
+        model.add_entity(entity)
+        world_state.rollback()
+        self.assertMatches(model, world_state, 'rollback')
+
+    def test_without_transaction(self):
+        world_state, _ = random_world(random.Random(12), self.domain, self.problem, extra=6)
+        self.assertFalse(world_state.in_transaction())
+        with self.assertRaises(Exception):
+            world_state.commit()
+        with self.assertRaises(Exception):
+            world_state.rollback()
+
+    def test_setters_during_transaction(self):
+        world_state, model = random_world(random.Random(13), self.domain, self.problem, extra=6)
+        world_state.begin()
+        with self.assertRaises(Exception):
+            world_state.relations = world_state.relations
+        with self.assertRaises(Exception):
+            world_state.entities = world_state.entities
+        world_state.rollback()
+        world_state.relations = world_state.relations
+        self.assertMatches(model, world_state, 'setters')
+
+    def test_rollback_in_fork(self):
+        rng = random.Random(14)
+        world_state, model = random_world(rng, self.domain, self.problem, extra=6)
+        fork = world_state.fork()
+        sibling = world_state.fork()
+        sibling_model = model.copy()
+        relation = None
+        while relation is None or model.get_value(relation) is not None:
+            relation = random_relation(rng, self.domain, list(model.entities.values()))
+        sibling.add_relation(relation)
+        sibling_model.set_value(relation, relation.value)
+
+        fork.begin()
+        fork_model = model.copy()
+        for step in range(30):
+            self._random_change(rng, fork, fork_model, step)
+        fork.rollback()
+        self.assertMatches(model, fork, 'fork')
+        self.assertMatches(model, world_state, 'parent')
+        self.assertMatches(sibling_model, sibling, 'sibling')
+
+
+if __name__ == '__main__':
+    unittest.main()